@@ -9,6 +9,7 @@ require("nonebot_plugin_uninfo")
 from .utils import safe_unlink
 from .config import Config, pconfig
 from .matchers import clear_result_cache
+from .renders.cache import prune_card_cache
 
 __plugin_meta__ = PluginMetadata(
     name="链接分享解析 Alconna 版",
@@ -39,17 +40,22 @@ from nonebot_plugin_apscheduler import scheduler
 async def clean_plugin_cache():
     try:
         files = [f for f in pconfig.cache_dir.iterdir() if f.is_file()]
-        if not files:
+        # 没有文件时仍然清理 result 缓存和卡片缓存
+        if files:
+            # 并发删除文件
+            tasks = [safe_unlink(file) for file in files]
+            await asyncio.gather(*tasks)
+            logger.success(f"Successfully cleaned {len(files)} cache files")
+        else:
             logger.info("No cache files to clean")
-            return
-
-        # 并发删除文件
-        tasks = [safe_unlink(file) for file in files]
-        await asyncio.gather(*tasks)
-
-        logger.success(f"Successfully cleaned {len(files)} cache files")
     except Exception:
         logger.exception("Error while cleaning cache files")
 
     # 资源清理完毕后，清理 result 缓存
     clear_result_cache()
+
+    # 卡片持久化缓存按大小和时间淘汰
+    try:
+        await asyncio.to_thread(prune_card_cache)
+    except Exception:
+        logger.exception("Error while pruning card cache")
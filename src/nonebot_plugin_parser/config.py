@@ -5,7 +5,7 @@ from apilmoji import ELK_SH_CDN, EmojiStyle
 from pydantic import BaseModel
 from bilibili_api.video import VideoCodecs, VideoQuality
 
-from .constants import RenderType, PlatformEnum
+from .constants import RenderType, ImageFormat, PlatformEnum, ContentsOrder, RenderPoolType
 
 require("nonebot_plugin_localstore")
 import nonebot_plugin_localstore as _store
@@ -28,10 +28,24 @@ class Config(BaseModel):
     """是否需要上传音频文件"""
     parser_use_base64: bool = False
     """是否使用 base64 编码发送图片，音频，视频"""
+    parser_send_memory_budget: int = 256
+    """使用 base64 发送时, 同时发送的媒体占用内存上限 单位 MB"""
+    parser_send_image_max_side: int = 0
+    """发送图片的最大边长 单位像素, 超出时缩小后发送, 0 为不限制"""
+    parser_send_image_max_size: int = 0
+    """发送图片的大小预算 单位 KB, 超出时重新编码为 JPEG, 0 为不限制"""
     parser_max_size: int = 90
     """资源最大大小 默认 100 单位 MB"""
     parser_duration_maximum: int = 480
     """视频/音频最大时长"""
+    parser_oversize_reencode: bool = False
+    """视频超过大小限制时, 是否降低画质或重新编码以适应大小限制"""
+    parser_reencode_source_max_size: int = 500
+    """允许下载用于重新编码的源视频最大大小 单位 MB"""
+    parser_reencode_preset: str = "veryfast"
+    """重新编码使用的 x264 preset"""
+    parser_reencode_two_pass: bool = False
+    """重新编码是否使用两遍编码(码率更精确, 耗时约翻倍)"""
     parser_append_url: bool = False
     """是否在解析结果中附加原始URL"""
     parser_disabled_platforms: list[PlatformEnum] = []
@@ -46,16 +60,50 @@ class Config(BaseModel):
     """B站视频分辨率"""
     parser_render_type: RenderType = RenderType.common
     """Renderer 类型"""
+    parser_render_pool: RenderPoolType = RenderPoolType.thread
+    """common 渲染器绘制所用的渲染池类型"""
+    parser_render_pool_size: int = 2
+    """渲染池大小"""
+    parser_card_format: ImageFormat = ImageFormat.png
+    """common 渲染器输出的卡片格式"""
+    parser_card_quality: int = 85
+    """卡片 JPEG/WebP 编码质量"""
+    parser_card_compress_level: int = 6
+    """卡片 PNG 压缩等级 0-9"""
+    parser_card_quantize: bool = False
+    """卡片 PNG 是否量化为 256 色调色板"""
+    parser_card_max_size: int = 0
+    """卡片大小预算 单位 KB, 超出时依次尝试更小的编码, 0 为不限制"""
+    parser_card_max_height: int = 0
+    """卡片单页最大高度 单位像素, 超出时分页输出, 0 为不分页"""
+    parser_html_page_pool_size: int = 2
+    """htmlrender 渲染器预热的浏览器页面数"""
+    parser_html_page_max_uses: int = 50
+    """单个浏览器页面的最大渲染次数, 达到后关闭重建"""
+    parser_card_cache_max_size: int = 200
+    """卡片持久化缓存的总大小上限 单位 MB"""
+    parser_card_cache_max_age: int = 7
+    """卡片持久化缓存的保留天数, 每次命中重新计时"""
+    parser_preview_timeout: float = 0
+    """卡片渲染的预览时限 单位秒, 超时未完成时先发送预览, 0 为不预览"""
     parser_custom_font: str | None = None
     """自定义字体"""
     parser_custom_font_weight: int = 700
     """字体粗细程度"""
     parser_need_forward_contents: bool = True
     """是否需要转发媒体内容"""
+    parser_contents_order: ContentsOrder = ContentsOrder.strict
+    """媒体内容的发送顺序策略"""
+    parser_forward_max_nodes: int = 0
+    """单条合并转发消息的节点数上限, 0 为不限制"""
+    parser_forward_max_size: int = 0
+    """单条合并转发消息的媒体大小上限 单位 MB, 0 为不限制"""
     parser_emoji_cdn: str = ELK_SH_CDN
     """Pilmoji 表情 CDN"""
     parser_emoji_style: EmojiStyle = EmojiStyle.FACEBOOK
     """Pilmoji 表情样式"""
+    parser_emoji_dir: str | None = None
+    """离线 emoji 图集目录"""
     parser_group_blacklist_enabled: bool = True
     """是否启用群组黑名单模式(默认启用，即所有群聊的解析都是开启的)"""
 
@@ -89,6 +137,26 @@ class Config(BaseModel):
         """视频/音频最大时长"""
         return self.parser_duration_maximum
 
+    @property
+    def oversize_reencode(self) -> bool:
+        """视频超过大小限制时, 是否降低画质或重新编码"""
+        return self.parser_oversize_reencode
+
+    @property
+    def reencode_source_max_size(self) -> int:
+        """允许下载用于重新编码的源视频最大大小"""
+        return self.parser_reencode_source_max_size
+
+    @property
+    def reencode_preset(self) -> str:
+        """重新编码使用的 x264 preset"""
+        return self.parser_reencode_preset
+
+    @property
+    def reencode_two_pass(self) -> bool:
+        """重新编码是否使用两遍编码"""
+        return self.parser_reencode_two_pass
+
     @property
     def disabled_platforms(self) -> list[PlatformEnum]:
         """禁止的解析器"""
@@ -109,6 +177,71 @@ class Config(BaseModel):
         """Renderer 类型"""
         return self.parser_render_type
 
+    @property
+    def render_pool(self) -> RenderPoolType:
+        """common 渲染器绘制所用的渲染池类型"""
+        return self.parser_render_pool
+
+    @property
+    def render_pool_size(self) -> int:
+        """渲染池大小"""
+        return self.parser_render_pool_size
+
+    @property
+    def card_format(self) -> ImageFormat:
+        """common 渲染器输出的卡片格式"""
+        return self.parser_card_format
+
+    @property
+    def card_quality(self) -> int:
+        """卡片 JPEG/WebP 编码质量"""
+        return self.parser_card_quality
+
+    @property
+    def card_compress_level(self) -> int:
+        """卡片 PNG 压缩等级"""
+        return self.parser_card_compress_level
+
+    @property
+    def card_quantize(self) -> bool:
+        """卡片 PNG 是否量化为调色板"""
+        return self.parser_card_quantize
+
+    @property
+    def card_max_size(self) -> int:
+        """卡片大小预算 单位 KB"""
+        return self.parser_card_max_size
+
+    @property
+    def card_max_height(self) -> int:
+        """卡片单页最大高度"""
+        return self.parser_card_max_height
+
+    @property
+    def html_page_pool_size(self) -> int:
+        """htmlrender 渲染器预热的浏览器页面数"""
+        return self.parser_html_page_pool_size
+
+    @property
+    def html_page_max_uses(self) -> int:
+        """单个浏览器页面的最大渲染次数"""
+        return self.parser_html_page_max_uses
+
+    @property
+    def card_cache_max_size(self) -> int:
+        """卡片持久化缓存的总大小上限 单位 MB"""
+        return self.parser_card_cache_max_size
+
+    @property
+    def card_cache_max_age(self) -> int:
+        """卡片持久化缓存的保留天数"""
+        return self.parser_card_cache_max_age
+
+    @property
+    def preview_timeout(self) -> float:
+        """卡片渲染的预览时限 单位秒"""
+        return self.parser_preview_timeout
+
     @property
     def bili_ck(self) -> str | None:
         """bilibili cookies"""
@@ -139,11 +272,36 @@ class Config(BaseModel):
         """是否使用 base64 编码发送图片，音频，视频"""
         return self.parser_use_base64
 
+    @property
+    def send_memory_budget(self) -> int:
+        """使用 base64 发送时, 同时发送的媒体占用内存上限 单位 MB"""
+        return self.parser_send_memory_budget
+
+    @property
+    def send_image_max_side(self) -> int:
+        """发送图片的最大边长"""
+        return self.parser_send_image_max_side
+
+    @property
+    def send_image_max_size(self) -> int:
+        """发送图片的大小预算 单位 KB"""
+        return self.parser_send_image_max_size
+
     @property
     def append_url(self) -> bool:
         """是否在解析结果中附加原始URL"""
         return self.parser_append_url
 
+    @property
+    def emoji_dir(self) -> Path | None:
+        """离线 emoji 图集目录, 相对路径基于插件配置目录"""
+        if self.parser_emoji_dir:
+            emoji_dir = self.config_dir / self.parser_emoji_dir
+            if emoji_dir.is_dir():
+                return emoji_dir
+            logger.warning(f"离线 emoji 图集目录 {emoji_dir} 不存在")
+        return None
+
     @property
     def custom_font(self) -> Path | None:
         """自定义字体"""
@@ -174,6 +332,21 @@ class Config(BaseModel):
         """是否需要转发媒体内容"""
         return self.parser_need_forward_contents
 
+    @property
+    def contents_order(self) -> ContentsOrder:
+        """媒体内容的发送顺序策略"""
+        return self.parser_contents_order
+
+    @property
+    def forward_max_nodes(self) -> int:
+        """单条合并转发消息的节点数上限, 0 为不限制"""
+        return self.parser_forward_max_nodes
+
+    @property
+    def forward_max_size(self) -> int:
+        """单条合并转发消息的媒体大小上限 单位 MB, 0 为不限制"""
+        return self.parser_forward_max_size
+
     @property
     def emoji_cdn(self) -> str:
         """Pilmoji 表情 CDN"""
@@ -50,3 +50,21 @@ class RenderType(str, Enum):
     common = "common"
     htmlkit = "htmlkit"
     htmlrender = "htmlrender"
+
+
+class RenderPoolType(str, Enum):
+    none = "none"
+    thread = "thread"
+    process = "process"
+
+
+class ContentsOrder(str, Enum):
+    strict = "strict"
+    ready = "ready"
+    hybrid = "hybrid"
+
+
+class ImageFormat(str, Enum):
+    png = "png"
+    jpeg = "jpeg"
+    webp = "webp"
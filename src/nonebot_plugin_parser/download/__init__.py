@@ -18,8 +18,9 @@ from rich.progress import (
 from .task import auto_task
 from ..utils import merge_av, safe_unlink, generate_file_name, is_module_available
 from ..config import pconfig
+from .transcode import fit_video_size
 from ..constants import COMMON_HEADER, DOWNLOAD_TIMEOUT
-from ..exception import IgnoreException, DownloadException
+from ..exception import IgnoreException, DownloadException, SizeLimitException
 
 
 class StreamDownloader:
@@ -47,9 +48,17 @@ class StreamDownloader:
             task_id = progress.add_task(description=desc, total=total)
             yield partial(progress.update, task_id)
 
+    @property
+    def video_source_max_size(self) -> float:
+        """视频源文件最大大小, 启用重新编码时允许下载更大的源文件"""
+        if pconfig.oversize_reencode:
+            return max(pconfig.reencode_source_max_size, pconfig.max_size)
+        return pconfig.max_size
+
     @staticmethod
     def _validate_content_length(
         response: httpx.Response | curl_cffi.Response,
+        max_size: float,
     ) -> int:
         """获取文件长度"""
         content_length = response.headers.get("Content-Length")
@@ -59,9 +68,9 @@ class StreamDownloader:
             logger.warning(f"媒体 url: {response.url}, 大小为 0, 取消下载")
             raise IgnoreException
 
-        if (file_size := content_length / 1024 / 1024) > pconfig.max_size:
-            logger.warning(f"媒体 url: {response.url} 大小 {file_size:.2f} MB, 超过 {pconfig.max_size} MB, 取消下载")
-            raise IgnoreException
+        if (file_size := content_length / 1024 / 1024) > max_size:
+            logger.warning(f"媒体 url: {response.url} 大小 {file_size:.2f} MB, 超过 {max_size} MB, 取消下载")
+            raise SizeLimitException(file_size)
 
         return content_length
 
@@ -71,6 +80,7 @@ class StreamDownloader:
         *,
         file_path: Path,
         headers: dict[str, str],
+        max_size: float,
         chunk_size: int = 64 * 1024,
     ) -> Path:
         """download file by url with stream"""
@@ -82,7 +92,7 @@ class StreamDownloader:
             follow_redirects=True,
         ) as response:
             response.raise_for_status()
-            content_length = self._validate_content_length(response)
+            content_length = self._validate_content_length(response, max_size)
 
             with self.rich_progress(
                 f"httpx | {file_path.name}",
@@ -101,6 +111,7 @@ class StreamDownloader:
         *,
         file_path: Path,
         headers: dict[str, str],
+        max_size: float,
     ) -> Path:
         async with curl_cffi.AsyncSession(allow_redirects=True) as session:
             response: curl_cffi.Response = await session.get(
@@ -110,7 +121,7 @@ class StreamDownloader:
                 stream=True,
             )
             response.raise_for_status()
-            content_length = self._validate_content_length(response)
+            content_length = self._validate_content_length(response, max_size)
 
             with self.rich_progress(
                 f"curl_cffi | {file_path.name}",
@@ -130,8 +141,9 @@ class StreamDownloader:
         file_name: str | None = None,
         ext_headers: dict[str, str] | None = None,
         chunk_size: int = 64 * 1024,
+        max_size: float | None = None,
     ) -> Path:
-        """download file by url with fallback"""
+        """download file by url with fallback, max_size 单位 MB, 默认为 `parser_max_size`"""
         if not file_name:
             file_name = generate_file_name(url)
         file_path = self.cache_dir / file_name
@@ -139,15 +151,18 @@ class StreamDownloader:
             return file_path
 
         headers = {**self.headers, **(ext_headers or {})}
+        max_size = max_size or pconfig.max_size
 
         try:
             path = await self._download_file_with_httpx(
-                url, file_path=file_path, headers=headers, chunk_size=chunk_size
+                url, file_path=file_path, headers=headers, max_size=max_size, chunk_size=chunk_size
             )
         except httpx.HTTPError:
             logger.opt(exception=True).warning(f"下载失败(httpx) | url: {url}")
             try:
-                path = await self._download_file_with_curl_cffi(url, file_path=file_path, headers=headers)
+                path = await self._download_file_with_curl_cffi(
+                    url, file_path=file_path, headers=headers, max_size=max_size
+                )
             except curl_cffi.CurlError:
                 logger.opt(exception=True).warning(f"下载失败(curl_cffi) | url: {url}")
                 raise DownloadException("媒体下载失败")
@@ -166,12 +181,14 @@ class StreamDownloader:
         if video_name is None:
             video_name = generate_file_name(url, ".mp4")
 
-        return await self._download_file(
+        video_path = await self._download_file(
             url,
             file_name=video_name,
             ext_headers=ext_headers,
             chunk_size=1024 * 1024,
+            max_size=self.video_source_max_size,
         )
+        return await fit_video_size(video_path)
 
     @auto_task
     async def download_audio(
@@ -217,14 +234,15 @@ class StreamDownloader:
         *,
         output_path: Path,
         ext_headers: dict[str, str] | None = None,
+        max_size: float | None = None,
     ) -> Path:
         """download video and audio file by url with stream and merge"""
         v_path, a_path = await asyncio.gather(
-            self._download_file(v_url, ext_headers=ext_headers),
-            self._download_file(a_url, ext_headers=ext_headers),
+            self._download_file(v_url, ext_headers=ext_headers, max_size=max_size),
+            self._download_file(a_url, ext_headers=ext_headers, max_size=max_size),
         )
         await merge_av(v_path=v_path, a_path=a_path, output_path=output_path)
-        return output_path
+        return await fit_video_size(output_path)
 
     @auto_task
     async def download_m3u8(
@@ -255,7 +273,7 @@ class StreamDownloader:
             logger.exception("m3u8 视频下载失败")
             raise DownloadException("m3u8 视频下载失败")
 
-        return video_path
+        return await fit_video_size(video_path)
 
     async def _get_m3u8_slices(self, m3u8_url: str):
         """获取 m3u8 分片"""
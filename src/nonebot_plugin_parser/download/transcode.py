@@ -0,0 +1,129 @@
+import os
+import json
+import asyncio
+from pathlib import Path
+from weakref import WeakValueDictionary
+
+from nonebot import logger
+
+from ..utils import fmt_size, safe_unlink, exec_ffmpeg_cmd
+from ..config import pconfig
+from ..exception import SizeLimitException
+
+AUDIO_BITRATE = 128
+"""重新编码的音频码率 kbps"""
+MIN_VIDEO_BITRATE = 150
+"""可接受的最低视频码率 kbps, 低于该值时放弃重新编码"""
+CONTAINER_OVERHEAD = 0.95
+"""扣除容器封装开销后, 可用于音视频流的大小比例"""
+
+# 同一视频同时只重新编码一次, 锁不再被引用时自动移除
+_fit_locks: WeakValueDictionary[Path, asyncio.Lock] = WeakValueDictionary()
+
+
+async def probe_video(video_path: Path) -> tuple[float, bool]:
+    """探测视频时长(秒)以及是否包含音轨"""
+    cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-show_entries",
+        "format=duration:stream=codec_type",
+        "-of",
+        "json",
+        str(video_path),
+    ]
+    info = json.loads(await exec_ffmpeg_cmd(cmd))
+    duration = float(info.get("format", {}).get("duration") or 0)
+    has_audio = any(stream.get("codec_type") == "audio" for stream in info.get("streams", []))
+    return duration, has_audio
+
+
+def calc_video_bitrate(max_size: float, duration: float, has_audio: bool) -> int:
+    """根据目标大小(MB)和时长(秒)计算视频码率 kbps"""
+    total_kbps = max_size * 1024 * 1024 * 8 * CONTAINER_OVERHEAD / 1000 / duration
+    audio_kbps = AUDIO_BITRATE if has_audio else 0
+    return int(total_kbps - audio_kbps)
+
+
+async def compress_video_to_size(
+    video_path: Path,
+    max_size: float,
+    *,
+    preset: str = "veryfast",
+    two_pass: bool = False,
+) -> Path:
+    """按目标大小(MB)重新编码视频, 成功后覆盖原文件
+
+    只探测一次源文件, 根据时长计算目标码率;
+    两遍编码码率更精确, 否则使用受 maxrate 限制的 CRF 编码
+    """
+    source_size = video_path.stat().st_size / 1024 / 1024
+    duration, has_audio = await probe_video(video_path)
+    if duration <= 0:
+        raise SizeLimitException(source_size, "无法获取视频时长, 取消重新编码")
+
+    video_kbps = calc_video_bitrate(max_size, duration, has_audio)
+    if video_kbps < MIN_VIDEO_BITRATE:
+        raise SizeLimitException(
+            source_size,
+            f"视频时长 {duration:.0f} 秒, 压缩到 {max_size} MB 码率过低({video_kbps} kbps), 取消重新编码",
+        )
+
+    logger.info(f"重新编码 {video_path.name}, {fmt_size(video_path)}, 目标码率 {video_kbps} kbps")
+
+    output_path = video_path.with_name(f"{video_path.stem}_fit{video_path.suffix}")
+    passlog = video_path.with_name(f"{video_path.stem}_passlog")
+
+    encode_args = ["ffmpeg", "-y", "-i", str(video_path), "-c:v", "libx264", "-preset", preset]
+    audio_args = ["-c:a", "aac", "-b:a", f"{AUDIO_BITRATE}k"] if has_audio else ["-an"]
+    output_args = ["-movflags", "+faststart", str(output_path)]
+
+    try:
+        if two_pass:
+            bitrate_args = ["-b:v", f"{video_kbps}k", "-passlogfile", str(passlog)]
+            await exec_ffmpeg_cmd([*encode_args, *bitrate_args, "-pass", "1", "-an", "-f", "null", os.devnull])
+            await exec_ffmpeg_cmd([*encode_args, *bitrate_args, "-pass", "2", *audio_args, *output_args])
+        else:
+            bitrate_args = ["-crf", "23", "-maxrate", f"{video_kbps}k", "-bufsize", f"{video_kbps * 2}k"]
+            await exec_ffmpeg_cmd([*encode_args, *bitrate_args, *audio_args, *output_args])
+    finally:
+        for log_file in video_path.parent.glob(f"{passlog.name}*"):
+            await safe_unlink(log_file)
+
+    if (output_size := output_path.stat().st_size / 1024 / 1024) > max_size:
+        await safe_unlink(output_path)
+        raise SizeLimitException(output_size, f"重新编码后大小 {output_size:.2f} MB 仍超过 {max_size} MB")
+
+    output_path.replace(video_path)
+    logger.success(f"重新编码 {video_path.name} 成功, {fmt_size(video_path)}")
+    return video_path
+
+
+async def fit_video_size(video_path: Path) -> Path:
+    """启用 `parser_oversize_reencode` 时, 将超过大小限制的视频重新编码到限制以内"""
+    if not pconfig.oversize_reencode:
+        return video_path
+
+    if (lock := _fit_locks.get(video_path)) is None:
+        lock = _fit_locks[video_path] = asyncio.Lock()
+    async with lock:
+        if video_path.stat().st_size / 1024 / 1024 <= pconfig.max_size:
+            return video_path
+        try:
+            return await compress_video_to_size(
+                video_path,
+                pconfig.max_size,
+                preset=pconfig.reencode_preset,
+                two_pass=pconfig.reencode_two_pass,
+            )
+        except RuntimeError as e:
+            logger.warning(f"重新编码 {video_path.name} 失败: {e}")
+            raise SizeLimitException(video_path.stat().st_size / 1024 / 1024)
+        except SizeLimitException as e:
+            logger.warning(e.message)
+            raise
+        finally:
+            # 源文件过大, 不保留在缓存中
+            if video_path.exists() and video_path.stat().st_size / 1024 / 1024 > pconfig.max_size:
+                await safe_unlink(video_path)
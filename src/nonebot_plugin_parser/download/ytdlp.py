@@ -10,6 +10,7 @@ from nonebot import logger
 from .task import auto_task
 from ..utils import LimitedSizeDict, generate_file_name
 from ..config import pconfig
+from .transcode import fit_video_size
 from ..exception import ParseException, IgnoreException
 
 
@@ -97,6 +98,9 @@ class YtdlpDownloader:
             ydl_opts["outtmpl"] = str(video_path)
             ydl_opts["merge_output_format"] = "mp4"
             ydl_opts["format"] = f"bv[filesize<={duration // 10 + 10}M]+ba/b[filesize<={duration // 8 + 10}M]"
+            if pconfig.oversize_reencode:
+                # 没有合适大小的格式时, 下载最低画质再重新编码
+                ydl_opts["format"] += "/wv*+ba/w"
             ydl_opts["postprocessors"] = [{"key": "FFmpegVideoConvertor", "preferedformat": "mp4"}]
 
             if cookiefile:
@@ -106,10 +110,9 @@ class YtdlpDownloader:
                 with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                     await asyncio.to_thread(ydl.download, [url])
             except Exception:
-                if video_path.exists():
-                    return video_path
-                raise
-        return video_path
+                if not video_path.exists():
+                    raise
+        return await fit_video_size(video_path)
 
     @auto_task
     async def download_audio(self, url: str, cookiefile: Path | None = None) -> Path:
@@ -20,3 +20,11 @@ class IgnoreException(ParseException):
 
 class TipException(ParseException):
     """提示异常"""
+
+
+class SizeLimitException(IgnoreException):
+    """媒体大小超过限制"""
+
+    def __init__(self, size: float, message: str | None = None):
+        super().__init__(message or f"媒体大小 {size:.2f} MB 超过限制")
+        self.size = size
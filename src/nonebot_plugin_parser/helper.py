@@ -1,3 +1,4 @@
+import asyncio
 from typing import Any, Literal
 from pathlib import Path
 from functools import wraps
@@ -13,12 +14,15 @@ from nonebot_plugin_alconna.uniseg import (
     Image,
     Video,
     Voice,
+    RefNode,
     Segment,
     Reference,
     CustomNode,
     UniMessage,
 )
+from nonebot_plugin_alconna.uniseg.segment import Media
 
+from . import upload, outgoing
 from .config import pconfig
 
 # from .exception import TipException
@@ -41,6 +45,21 @@ ID_ADAPTERS = {
 """支持的传入 emoji id 发送 reaction 的适配器"""
 
 
+def _node_size(node: RefNode | CustomNode) -> int:
+    """转发节点中本地媒体的大小"""
+    if not isinstance(node, CustomNode) or isinstance(node.content, str):
+        return 0
+    size = 0
+    for seg in node.content:
+        if isinstance(seg, Media) and seg.raw is not None:
+            size += len(seg.raw) if isinstance(seg.raw, bytes) else seg.raw.getbuffer().nbytes
+    return size + sum(Path(seg.path).stat().st_size for seg in outgoing.iter_media(node.content))
+
+
+# 持有后台回应任务的引用, 避免被垃圾回收
+_reaction_tasks: set[asyncio.Task[None]] = set()
+
+
 class UniHelper:
     @staticmethod
     def construct_forward_message(
@@ -64,6 +83,23 @@ class UniHelper:
 
         return Reference(nodes=nodes)
 
+    @staticmethod
+    def split_forward_message(reference: Reference) -> list[Reference]:
+        """按节点数和媒体大小拆分转发消息, 避免单条消息过大被适配器拒绝或超时, 上限为 0 时不限制"""
+        max_nodes = pconfig.forward_max_nodes
+        max_size = pconfig.forward_max_size * 1024 * 1024
+
+        chunks: list[list[RefNode | CustomNode]] = [[]]
+        size = 0
+        for node in reference.children:
+            node_size = _node_size(node)
+            if chunks[-1] and (0 < max_nodes <= len(chunks[-1]) or 0 < max_size < size + node_size):
+                chunks.append([])
+                size = 0
+            chunks[-1].append(node)
+            size += node_size
+        return [Reference(id=reference.id, nodes=nodes) for nodes in chunks if nodes]
+
     @staticmethod
     def img_seg(
         file: Path | bytes,
@@ -71,19 +107,12 @@ class UniHelper:
         """图片 Seg"""
         if isinstance(file, bytes):
             return Image(raw=file)
-
-        if pconfig.use_base64:
-            return Image(raw=file.read_bytes())
-        else:
-            return Image(path=file)
+        return Image(path=file)
 
     @staticmethod
     def record_seg(audio_path: Path) -> Voice:
         """语音 Seg"""
-        if pconfig.use_base64:
-            return Voice(raw=audio_path.read_bytes())
-        else:
-            return Voice(path=audio_path)
+        return Voice(path=audio_path)
 
     @classmethod
     def video_seg(
@@ -100,16 +129,10 @@ class UniHelper:
             # 转为文件 Seg
             return cls.file_seg(video_path, display_name=video_path.name)
         else:
-            if pconfig.use_base64:
-                video = Video(raw=video_path.read_bytes())
-                if thumbnail and thumbnail.stat().st_size > 0:
-                    video.thumbnail = cls.img_seg(thumbnail.read_bytes())
-                return video
-            else:
-                video = Video(path=video_path)
-                if thumbnail and thumbnail.stat().st_size > 0:
-                    video.thumbnail = cls.img_seg(thumbnail)
-                return video
+            video = Video(path=video_path)
+            if thumbnail and thumbnail.stat().st_size > 0:
+                video.thumbnail = cls.img_seg(thumbnail)
+            return video
 
     @staticmethod
     def file_seg(
@@ -119,11 +142,45 @@ class UniHelper:
         """文件 Seg"""
         if not display_name:
             display_name = file.name
+        return File(path=file, name=display_name)
 
-        if pconfig.use_base64:
-            return File(raw=file.read_bytes(), name=display_name)
-        else:
-            return File(path=file, name=display_name)
+    @classmethod
+    async def send(cls, message: UniMessage) -> None:
+        """发送消息
+
+        已上传过的媒体引用平台资源 ID, 启用 base64 时在发送前读取并编码本地媒体,
+        过大的合并转发消息拆分后按顺序发送
+        """
+        if len(message) == 1 and isinstance(forward := message[0], Reference):
+            if len(chunks := cls.split_forward_message(forward)) > 1:
+                await cls._send_chunks(chunks)
+                return
+
+        adapter = current_bot.get().adapter.get_name()
+        # OneBot V11 接受 base64:// URL, 直接传入编码好的字符串
+        as_url = adapter == SupportAdapter.onebot11
+
+        async def send_prepared(message: UniMessage):
+            async with outgoing.prepare(message, as_url) as prepared:
+                return await prepared.send()
+
+        await upload.send(message, adapter, send_prepared)
+
+    @classmethod
+    async def _send_chunks(cls, chunks: list[Reference]) -> None:
+        """按顺序逐条发送拆分后的转发消息, 部分失败时提示失败条数, 全部失败时抛出第一个异常"""
+        errors: list[Exception] = []
+        for chunk in chunks:
+            try:
+                await cls.send(UniMessage(chunk))
+            except Exception as e:
+                logger.opt(exception=e).warning("合并转发消息发送失败")
+                errors.append(e)
+        if not errors:
+            return
+        if len(errors) == len(chunks):
+            raise errors[0]
+        await cls.send(UniMessage(f"合并转发消息共 {len(chunks)} 条, 其中 {len(errors)} 条发送失败"))
 
     @classmethod
     async def message_reaction(
@@ -142,14 +199,37 @@ class UniHelper:
         except Exception:
             logger.opt(exception=True).warning(f"reaction {emoji} to {message_id} failed, maybe not support")
 
+    @classmethod
+    def dispatch_reaction(
+        cls,
+        event: Event,
+        status: Literal["fail", "resolving", "done"],
+        previous: asyncio.Task[None] | None = None,
+    ) -> asyncio.Task[None]:
+        """在后台发送消息回应, 不阻塞调用方
+
+        Args:
+            previous: 上一个回应任务, 完成后再发送本次回应, 保证回应顺序
+        """
+
+        async def react():
+            if previous is not None:
+                await asyncio.wait({previous})
+            await cls.message_reaction(event, status)
+
+        task = asyncio.create_task(react(), name=f"reaction | {status}")
+        _reaction_tasks.add(task)
+        task.add_done_callback(_reaction_tasks.discard)
+        return task
+
     @classmethod
     def with_reaction(cls, func: Callable[..., Awaitable[Any]]):
-        """自动回应装饰器"""
+        """自动回应装饰器, 回应在后台按顺序发送, 与解析并行"""
 
         @wraps(func)
         async def wrapper(*args, **kwargs):
             event = current_event.get()
-            await cls.message_reaction(event, "resolving")
+            resolving = cls.dispatch_reaction(event, "resolving")
 
             try:
                 result = await func(*args, **kwargs)
@@ -157,10 +237,10 @@ class UniHelper:
             #     await UniMessage.text(e.message).send()
             #     raise
             except Exception:
-                await cls.message_reaction(event, "fail")
+                cls.dispatch_reaction(event, "fail", resolving)
                 raise
 
-            await cls.message_reaction(event, "done")
+            cls.dispatch_reaction(event, "done", resolving)
             return result
 
         return wrapper
@@ -80,7 +80,7 @@ async def parser_handler(
     # 3. 渲染内容消息并发送
     renderer = get_renderer(result.platform.name)(result)
     async for message in renderer.render_messages():
-        await message.send()
+        await UniHelper.send(message)
 
     # 4. 缓存解析结果
     _RESULT_CACHE[cache_key] = result
@@ -106,10 +106,10 @@ async def _(message: Message = CommandArg()):
     audio_path = await parser.downloader.download_audio(
         audio_url, audio_name=f"{bvid}-{page_idx}.mp3", ext_headers=parser.headers
     )
-    await UniMessage(UniHelper.record_seg(audio_path)).send()
+    await UniHelper.send(UniMessage(UniHelper.record_seg(audio_path)))
 
     if pconfig.need_upload:
-        await UniMessage(UniHelper.file_seg(audio_path)).send()
+        await UniHelper.send(UniMessage(UniHelper.file_seg(audio_path)))
 
 
 from ..download import yt_dlp_downloader
@@ -129,16 +129,16 @@ if yt_dlp_downloader is not None:
         url = matched.group(0)
 
         audio_path = await yt_dlp_downloader.download_audio(url)
-        await UniMessage(UniHelper.record_seg(audio_path)).send()
+        await UniHelper.send(UniMessage(UniHelper.record_seg(audio_path)))
 
         if pconfig.need_upload:
-            await UniMessage(UniHelper.file_seg(audio_path)).send()
+            await UniHelper.send(UniMessage(UniHelper.file_seg(audio_path)))
 
 
 @on_command("blogin", block=True, permission=SUPER_PRIVATE).handle()
 async def _():
     parser = get_parser_by_type(BilibiliParser)
     qrcode = await parser.login_with_qrcode()
-    await UniMessage(UniHelper.img_seg(qrcode)).send()
+    await UniHelper.send(UniMessage(UniHelper.img_seg(qrcode)))
     async for msg in parser.check_qr_state():
         await UniMessage(msg).send()
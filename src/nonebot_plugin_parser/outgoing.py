@@ -0,0 +1,127 @@
+"""发送媒体 - 启用 base64 时在线程中读取并编码文件, 按内存预算限制同时发送的数据量"""
+
+import mmap
+import base64
+import asyncio
+from pathlib import Path
+from contextlib import contextmanager, asynccontextmanager
+from collections.abc import Iterator, AsyncIterator
+
+from nonebot import logger
+from nonebot_plugin_alconna.uniseg import File, Video, Reference, CustomNode, UniMessage
+from nonebot_plugin_alconna.uniseg.segment import Media
+
+from .config import pconfig
+
+ENCODE_CHUNK = 3 * 1024 * 1024
+"""分块编码大小, 需为 3 的倍数, 保证各块的 base64 可以直接拼接"""
+
+
+class MemoryBudget:
+    """按字节计数的异步信号量"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._used = 0
+        self._cond = asyncio.Condition()
+
+    @asynccontextmanager
+    async def reserve(self, size: int) -> AsyncIterator[None]:
+        """占用 size 字节直到退出, 超过上限的单次占用按上限计算, 避免永远等待"""
+        size = min(size, self.limit)
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._used + size <= self.limit)
+            self._used += size
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self._used -= size
+                self._cond.notify_all()
+
+
+_budget = MemoryBudget(max(pconfig.send_memory_budget, 1) * 1024 * 1024)
+
+
+@contextmanager
+def _map_file(path: Path) -> Iterator[mmap.mmap | bytes]:
+    """只读映射文件, 由系统按需换入页面, 空文件无法映射时返回空字节串"""
+    with path.open("rb") as f:
+        if path.stat().st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
+def _encode_base64_url(path: Path) -> str:
+    """通过 mmap 分块编码, 不在内存中保留原始文件的副本
+
+    编码结果写入 bytearray 后解码为 str, 解码期间同时存在两份, 见 payload_size
+    """
+    out = bytearray(b"base64://")
+    with _map_file(path) as mm:
+        view = memoryview(mm)
+        try:
+            for start in range(0, len(mm), ENCODE_CHUNK):
+                out += base64.b64encode(view[start : start + ENCODE_CHUNK])
+        finally:
+            view.release()
+    return out.decode("ascii")
+
+
+def _read_raw(path: Path) -> bytes:
+    """通过 mmap 读取, 只复制一次"""
+    with _map_file(path) as mm:
+        return mm[:]
+
+
+def payload_size(size: int, as_url: bool) -> int:
+    """读取一个文件时的内存峰值, base64 URL 解码为 str 时编码结果同时存在两份"""
+    return size * 4 // 3 * 2 if as_url else size
+
+
+def load_payload(path: Path, as_url: bool) -> bytes | str:
+    """读取文件, as_url 为 True 时返回 base64:// URL, 否则返回原始数据"""
+    return _encode_base64_url(path) if as_url else _read_raw(path)
+
+
+def iter_media(message: UniMessage | list) -> Iterator[Media]:
+    """遍历消息 (包括转发消息和视频缩略图) 中引用本地文件的媒体"""
+    for seg in message:
+        if isinstance(seg, Media) and seg.path is not None:
+            yield seg
+        if isinstance(seg, Video) and seg.thumbnail is not None and seg.thumbnail.path is not None:
+            yield seg.thumbnail
+        if isinstance(seg, Reference):
+            for node in seg.children:
+                if isinstance(node, CustomNode) and not isinstance(node.content, str):
+                    yield from iter_media(node.content)
+
+
+@asynccontextmanager
+async def prepare(message: UniMessage, as_url: bool) -> AsyncIterator[UniMessage]:
+    """在线程中读取消息内的本地媒体并替换为 base64 数据, 发送完成前占用内存预算
+
+    Args:
+        message: 待发送的消息
+        as_url: 适配器支持 base64:// URL 时为 True, 直接传入编码后的字符串, 省去适配器再次编码
+    """
+    medias = list(iter_media(message)) if pconfig.use_base64 else []
+    if not medias:
+        yield message
+        return
+
+    # 文件由适配器上传, 始终使用原始数据
+    jobs = [(seg, Path(seg.path), as_url and not isinstance(seg, File)) for seg in medias if seg.path is not None]
+    size = sum(payload_size(path.stat().st_size, url) for _, path, url in jobs)
+    async with _budget.reserve(size):
+        payloads = await asyncio.gather(*(asyncio.to_thread(load_payload, path, url) for _, path, url in jobs))
+        for (seg, _, _), payload in zip(jobs, payloads):
+            seg.path = None
+            if isinstance(payload, str):
+                seg.url = payload
+            else:
+                seg.raw = payload
+        logger.debug(f"已读取 {len(jobs)} 个媒体文件, 共 {size / 1024 / 1024:.1f} MB")
+        yield message
@@ -1,5 +1,6 @@
 import re
 from typing import ClassVar
+from functools import partial
 
 from httpx import AsyncClient
 from nonebot import logger
@@ -35,7 +36,9 @@ class AcfunParser(BaseParser):
             logger.warning(f"视频时长 {duration} 超过最大限制 {pconfig.duration_maximum}")
             raise IgnoreException
 
-        video_task = self.downloader.download_m3u8(
+        # 发送或渲染需要时才开始下载
+        video_task = partial(
+            self.downloader.download_m3u8,
             video_info.m3u8_url,
             video_name=f"acfun_{acid}.mp4",
         )
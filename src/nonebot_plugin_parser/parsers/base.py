@@ -3,11 +3,12 @@ from abc import ABC
 from typing import TYPE_CHECKING, Any, TypeVar, ClassVar, cast, final
 from asyncio import Task
 from pathlib import Path
+from functools import partial
 from collections.abc import Callable, Coroutine
 from typing_extensions import Unpack
 
 from .data import Platform, ParseResult, ImageContent, ParseResultKwargs
-from .task import PathTask
+from .task import PathTask, PathFactory
 from ..config import pconfig as pconfig
 from ..download import downloader
 from ..constants import IOS_HEADER, COMMON_HEADER, ANDROID_HEADER, COMMON_TIMEOUT
@@ -16,6 +17,7 @@ from ..constants import PlatformEnum as PlatformEnum
 from ..exception import ParseException
 from ..exception import IgnoreException as IgnoreException
 from ..exception import DownloadException as DownloadException
+from ..exception import SizeLimitException as SizeLimitException
 
 T = TypeVar("T", bound="BaseParser")
 HandlerFunc = Callable[[T, Match[str]], Coroutine[Any, Any, ParseResult]]
@@ -170,13 +172,16 @@ class BaseParser:
         author = Author(name=name, description=description)
 
         if avatar_url:
-            author.avatar = PathTask(downloader.download_img(avatar_url, ext_headers=self.headers))
+            author.avatar = PathTask(
+                partial(downloader.download_img, avatar_url, ext_headers=self.headers),
+                source=avatar_url,
+            )
 
         return author
 
     def create_video(
         self,
-        url_or_task: str | Task[Path],
+        url_or_task: str | Task[Path] | PathFactory,
         cover_url: str | None = None,
         duration: float | None = None,
         is_gif: bool = False,
@@ -186,37 +191,42 @@ class BaseParser:
         from ..utils import convert_video_to_gif, extract_video_first_frame
 
         if isinstance(url_or_task, str):
-            path_task = downloader.download_video(url_or_task, ext_headers=self.headers)
-        elif isinstance(url_or_task, Task):
-            path_task = url_or_task
+            path_task = PathTask(
+                partial(downloader.download_video, url_or_task, ext_headers=self.headers),
+                source=url_or_task,
+            )
+        else:
+            path_task = PathTask(url_or_task)
 
-        video_content = VideoContent(PathTask(path_task), duration=duration, is_gif=is_gif)
+        video_content = VideoContent(path_task, duration=duration, is_gif=is_gif)
 
         if cover_url:
-            cover_task = downloader.download_img(cover_url, ext_headers=self.headers)
+            video_content.cover = PathTask(
+                partial(downloader.download_img, cover_url, ext_headers=self.headers),
+                source=cover_url,
+            )
         else:
             # 如果没有封面 URL，尝试从视频中提取封面
             async def extract_cover():
-                video_path = await path_task
+                video_path = await path_task.get()
                 return await extract_video_first_frame(video_path)
 
-            cover_task = extract_cover()
-
-        video_content.cover = PathTask(cover_task)
+            cover_source = f"{url_or_task}#cover" if isinstance(url_or_task, str) else None
+            video_content.cover = PathTask(extract_cover, source=cover_source)
 
         if is_gif:
             # 需要转换为 GIF
             async def convert_to_gif():
-                video_path = await path_task
+                video_path = await path_task.get()
                 return await convert_video_to_gif(video_path)
 
-            video_content.gif_path = PathTask(convert_to_gif())
+            video_content.gif_path = PathTask(convert_to_gif)
 
         return video_content
 
     def create_gif(
         self,
-        url_or_task: str | Task[Path],
+        url_or_task: str | Task[Path] | PathFactory,
         cover_url: str | None = None,
     ):
         """创建 GIF 内容"""
@@ -229,37 +239,43 @@ class BaseParser:
         """创建图片内容列表"""
         contents: list[ImageContent] = []
         for url in image_urls:
-            task = downloader.download_img(url, ext_headers=self.headers)
-            contents.append(ImageContent(PathTask(task)))
+            task = PathTask(partial(downloader.download_img, url, ext_headers=self.headers), source=url)
+            contents.append(ImageContent(task))
         return contents
 
     def create_image(
         self,
-        url_or_task: str | Task[Path],
+        url_or_task: str | Task[Path] | PathFactory,
         alt: str | None = None,
     ):
         """创建单个图片内容"""
         if isinstance(url_or_task, str):
-            path_task = downloader.download_img(url_or_task, ext_headers=self.headers)
-        elif isinstance(url_or_task, Task):
-            path_task = url_or_task
+            path_task = PathTask(
+                partial(downloader.download_img, url_or_task, ext_headers=self.headers),
+                source=url_or_task,
+            )
+        else:
+            path_task = PathTask(url_or_task)
 
-        return ImageContent(PathTask(path_task), alt=alt)
+        return ImageContent(path_task, alt=alt)
 
     def create_audio(
         self,
-        url_or_task: str | Task[Path],
+        url_or_task: str | Task[Path] | PathFactory,
         duration: float = 0.0,
     ):
         """创建音频内容"""
         from .data import AudioContent
 
         if isinstance(url_or_task, str):
-            path_task = downloader.download_audio(url_or_task, ext_headers=self.headers)
-        elif isinstance(url_or_task, Task):
-            path_task = url_or_task
+            path_task = PathTask(
+                partial(downloader.download_audio, url_or_task, ext_headers=self.headers),
+                source=url_or_task,
+            )
+        else:
+            path_task = PathTask(url_or_task)
 
-        return AudioContent(PathTask(path_task), duration)
+        return AudioContent(path_task, duration)
 
     @property
     def downloader(self):
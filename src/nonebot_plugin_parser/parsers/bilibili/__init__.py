@@ -2,6 +2,8 @@ import json
 import asyncio
 from re import Match
 from typing import ClassVar
+from pathlib import Path
+from functools import partial
 from collections.abc import AsyncGenerator
 
 from msgspec import convert
@@ -17,12 +19,14 @@ from ..base import (
     ParseException,
     IgnoreException,
     DownloadException,
+    SizeLimitException,
     handle,
     pconfig,
 )
 from ..data import Platform, ImageContent, MediaContent
 from ..cookie import ck2dict
 from .dynamic import DynamicInfo
+from ...download.transcode import fit_video_size
 
 # 选择客户端
 select_client("curl_cffi")
@@ -129,27 +133,15 @@ class BilibiliParser(BaseParser):
             output_path = pconfig.cache_dir / f"{video_info.bvid}-{page_num}.mp4"
             if output_path.exists():
                 return output_path
-            v_url, a_url = await self.extract_download_urls(video=video, page_index=page_info.index)
+            candidates = await self.extract_download_candidates(video=video, page_index=page_info.index)
             if page_info.duration > pconfig.duration_maximum:
                 logger.warning(f"视频时长 {page_info.duration} 秒, 超过 {pconfig.duration_maximum} 秒, 取消下载")
                 raise IgnoreException
-            if a_url is not None:
-                path = await self.downloader.download_av_and_merge(
-                    v_url,
-                    a_url,
-                    output_path=output_path,
-                    ext_headers=self.headers,
-                )
-            else:
-                path = await self.downloader._download_file(
-                    v_url,
-                    file_name=output_path.name,
-                    ext_headers=self.headers,
-                )
-            return path
+
+            return await self._download_candidates(candidates, output_path)
 
         video_content = self.create_video(
-            asyncio.create_task(download_video()),
+            download_video,
             page_info.cover,
             page_info.duration,
         )
@@ -251,12 +243,12 @@ class BilibiliParser(BaseParser):
         contents: list[MediaContent] = []
         # 下载封面
         if cover := room_data.cover:
-            cover_task = self.downloader.download_img(cover, ext_headers=self.headers)
+            cover_task = partial(self.downloader.download_img, cover, ext_headers=self.headers)
             contents.append(self.create_image(cover_task))
 
         # 下载关键帧
         if keyframe := room_data.keyframe:
-            keyframe_task = self.downloader.download_img(keyframe, ext_headers=self.headers)
+            keyframe_task = partial(self.downloader.download_img, keyframe, ext_headers=self.headers)
             contents.append(self.create_image(keyframe_task))
 
         author = self.create_author(room_data.name, room_data.avatar)
@@ -298,6 +290,49 @@ class BilibiliParser(BaseParser):
             graphics=graphics,
         )
 
+    async def _download_candidates(self, candidates: list[tuple[str, str | None]], output_path: Path) -> Path:
+        """按画质从高到低下载视频
+
+        启用 `parser_oversize_reencode` 时, 超过大小限制依次尝试更低画质, 最低画质仍超过限制时下载后重新编码
+        """
+        if not pconfig.oversize_reencode:
+            v_url, a_url = candidates[0]
+            return await self._download_av(v_url, a_url, output_path)
+
+        for v_url, a_url in candidates:
+            try:
+                return await self._download_av(v_url, a_url, output_path)
+            except SizeLimitException:
+                logger.info("视频超过大小限制, 尝试下载更低画质")
+
+        v_url, a_url = candidates[-1]
+        return await self._download_av(v_url, a_url, output_path, self.downloader.video_source_max_size)
+
+    async def _download_av(
+        self,
+        v_url: str,
+        a_url: str | None,
+        output_path: Path,
+        max_size: float | None = None,
+    ) -> Path:
+        """下载视频流(和音频流), 超过大小限制时抛出 SizeLimitException"""
+        if a_url is not None:
+            return await self.downloader.download_av_and_merge(
+                v_url,
+                a_url,
+                output_path=output_path,
+                ext_headers=self.headers,
+                max_size=max_size,
+            )
+
+        path = await self.downloader._download_file(
+            v_url,
+            file_name=output_path.name,
+            ext_headers=self.headers,
+            max_size=max_size,
+        )
+        return await fit_video_size(path)
+
     async def extract_download_urls(
         self,
         video: Video | None = None,
@@ -307,8 +342,21 @@ class BilibiliParser(BaseParser):
         page_index: int = 0,
     ) -> tuple[str, str | None]:
         """解析视频下载链接"""
+        candidates = await self.extract_download_candidates(video, bvid=bvid, avid=avid, page_index=page_index)
+        return candidates[0]
+
+    async def extract_download_candidates(
+        self,
+        video: Video | None = None,
+        *,
+        bvid: str | None = None,
+        avid: int | None = None,
+        page_index: int = 0,
+    ) -> list[tuple[str, str | None]]:
+        """解析视频下载链接, 按画质从高到低排列, 最高不超过配置的画质"""
 
         from bilibili_api.video import (
+            VideoQuality,
             AudioStreamDownloadURL,
             VideoStreamDownloadURL,
             VideoDownloadURLDataDetecter,
@@ -320,22 +368,34 @@ class BilibiliParser(BaseParser):
         # 获取下载数据
         download_url_data = await video.get_download_url(page_index=page_index)
         detecter = VideoDownloadURLDataDetecter(download_url_data)
-        streams = detecter.detect_best_streams(
-            video_max_quality=pconfig.bili_video_quality,
-            codecs=pconfig.bili_video_codes,
-            no_dolby_video=True,
-            no_hdr=True,
+
+        qualities = sorted(
+            (q for q in VideoQuality if q.value <= pconfig.bili_video_quality.value),
+            key=lambda q: q.value,
+            reverse=True,
         )
-        video_stream = streams[0]
-        if not isinstance(video_stream, VideoStreamDownloadURL):
+        candidates: list[tuple[str, str | None]] = []
+        for quality in qualities:
+            streams = detecter.detect_best_streams(
+                video_max_quality=quality,
+                codecs=pconfig.bili_video_codes,
+                no_dolby_video=True,
+                no_hdr=True,
+            )
+            video_stream = streams[0]
+            if not isinstance(video_stream, VideoStreamDownloadURL):
+                continue
+            if any(video_stream.url == v_url for v_url, _ in candidates):
+                continue
+            logger.debug(f"视频流质量: {video_stream.video_quality.name}, 编码: {video_stream.video_codecs}")
+
+            audio_stream = streams[1]
+            a_url = audio_stream.url if isinstance(audio_stream, AudioStreamDownloadURL) else None
+            candidates.append((video_stream.url, a_url))
+
+        if not candidates:
             raise DownloadException("未找到可下载的视频流")
-        logger.debug(f"视频流质量: {video_stream.video_quality.name}, 编码: {video_stream.video_codecs}")
-
-        audio_stream = streams[1]
-        if not isinstance(audio_stream, AudioStreamDownloadURL):
-            return video_stream.url, None
-        logger.debug(f"音频流质量: {audio_stream.audio_quality.name}")
-        return video_stream.url, audio_stream.url
+        return candidates
 
     def _save_credential(self):
         """存储哔哩哔哩登录凭证"""
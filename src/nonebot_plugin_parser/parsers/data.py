@@ -5,7 +5,7 @@ from typing import Any, TypedDict
 from pathlib import Path
 from datetime import datetime
 from dataclasses import field, dataclass
-from collections.abc import Iterator, Awaitable
+from collections.abc import Iterator
 
 from .task import PathTask
 from .utils import fmt_duration
@@ -121,8 +121,8 @@ class ParseResult:
     """额外信息"""
     repost: ParseResult | None = None
     """转发的内容"""
-    render_image: Path | None = None
-    """渲染图片"""
+    render_images: list[Path] = field(default_factory=list)
+    """渲染图片, 分页时按顺序保存每一页"""
 
     @property
     def header(self) -> str | None:
@@ -194,27 +194,32 @@ class ParseResult:
         """格式化时间戳"""
         return datetime.fromtimestamp(self.timestamp).strftime(fmt) if self.timestamp is not None else None
 
-    def _iterate_download_coros(
+    def _iterate_path_tasks(
         self,
         img_only: bool = False,
-    ) -> Iterator[Awaitable[Path | None]]:
+    ) -> Iterator[PathTask]:
         if author := self.author:
             if author.avatar:
-                yield author.avatar.get()
+                yield author.avatar
 
         for cont in self.contents:
             if not img_only or isinstance(cont, ImageContent):
-                yield cont.path_task.get()
+                yield cont.path_task
 
             if isinstance(cont, VideoContent) and cont.cover:
-                yield cont.cover.get()
+                yield cont.cover
 
         for gra in self.graphics:
             if isinstance(gra, ImageContent):
-                yield gra.path_task.get()
+                yield gra.path_task
 
         if self.repost is not None:
-            yield from self.repost._iterate_download_coros(img_only)
+            yield from self.repost._iterate_path_tasks(img_only)
+
+    def prefetch(self, *, img_only: bool = False) -> None:
+        """开始下载 (包括转发内容的) 媒体但不等待, img_only 时只下载头像、图片和封面"""
+        for task in self._iterate_path_tasks(img_only):
+            task.prefetch()
 
     async def ensure_downloads_complete(
         self,
@@ -223,7 +228,7 @@ class ParseResult:
         suppress_errors: bool = True,
     ) -> None:
         await asyncio.gather(
-            *self._iterate_download_coros(img_only),
+            *(task.get() for task in self._iterate_path_tasks(img_only)),
             return_exceptions=suppress_errors,
         )
 
@@ -254,7 +259,7 @@ class ParseResult:
             f"graphics: {self.graphics}, "
             f"extra: {self.extra}, "
             f"repost: <<<<<<<{self.repost}>>>>>>, "
-            f"render_image: {self.render_image.name if self.render_image else 'None'}"
+            f"render_images: {[path.name for path in self.render_images]}"
         )
 
 
@@ -7,25 +7,51 @@ from nonebot import logger
 
 from ..exception import ParseException
 
+PathFactory = Callable[[], Task[Path] | Coroutine[Any, Any, Path]]
+"""下载任务的无参工厂函数, 调用时才开始下载"""
+
 
 class PathTask:
-    __slots__ = ("_path", "_task")
+    """媒体路径任务, 传入无参函数时延迟到首次等待或预取时才开始下载
+
+    source 为媒体来源 (通常为 URL), 用于在不下载的情况下标识内容
+    """
+
+    __slots__ = ("_factory", "_path", "_task", "source")
 
     def __init__(
         self,
-        task: Task[Path] | Coroutine[Any, Any, Path],
+        task: Task[Path] | Coroutine[Any, Any, Path] | PathFactory,
+        source: str | None = None,
     ):
+        self.source = source
+        self._task: Task[Path] | None = None
+        self._factory: PathFactory | None = None
         if isinstance(task, Task):
-            self._task: Task[Path] = task
-        else:
+            self._task = task
+        elif isinstance(task, Coroutine):
             self._task = create_task(task, name=task.__name__)
+        else:
+            self._factory = task
         self._path: Path | None = None
 
+    def _start(self) -> Task[Path]:
+        if self._task is None:
+            assert self._factory is not None
+            task = self._factory()
+            self._task = task if isinstance(task, Task) else create_task(task, name=task.__name__)
+            self._factory = None
+        return self._task
+
+    def prefetch(self) -> None:
+        """开始下载但不等待, 供渲染器提前启动需要的媒体"""
+        self._start()
+
     async def get(self) -> Path:
         if self._path is not None:
             return self._path
 
-        self._path = await self._task
+        self._path = await self._start()
         return self._path
 
     async def safe_get(
@@ -36,11 +62,35 @@ class PathTask:
             return await self.get()
         except Exception as e:
             if not isinstance(e, ParseException):
-                logger.opt(exception=e).error(f"task({self._task.get_name()}) failed")
+                logger.opt(exception=e).error(f"task({self.name}) failed")
             if on_error is not None:
                 on_error(e)
             return None
 
+    @property
+    def name(self) -> str:
+        """任务名称, 未开始时为工厂函数名"""
+        if self._task is not None:
+            return self._task.get_name()
+        return getattr(self._factory, "__name__", repr(self._factory))
+
+    @property
+    def path(self) -> Path | None:
+        """已下载完成的路径, 未完成或失败时为 None"""
+        return self._path
+
+    @property
+    def failed(self) -> bool:
+        """是否已经失败, 未开始或未完成的任务视为未失败"""
+        if self._path is not None or self._task is None or not self._task.done():
+            return False
+        return self._task.cancelled() or self._task.exception() is not None
+
+    @property
+    def done(self) -> bool:
+        """是否已经完成 (包括失败), 未开始的任务视为未完成"""
+        return self._path is not None or (self._task is not None and self._task.done())
+
     @property
     async def uri(self) -> str | None:
         path = await self.safe_get()
@@ -49,5 +99,7 @@ class PathTask:
     def __repr__(self) -> str:
         if self._path is not None:
             return f"PathTask(path={self._path.name})"
+        elif self._task is None:
+            return f"PathTask(lazy={self.name})"
         else:
-            return f"PathTask(task={self._task.get_name()}, done={self._task.done()})"
+            return f"PathTask(task={self.name}, done={self._task.done()})"
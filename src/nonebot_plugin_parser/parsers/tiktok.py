@@ -1,5 +1,6 @@
 import re
 from typing import ClassVar
+from functools import partial
 
 from .base import BaseParser, PlatformEnum, handle
 from .data import Author, Platform
@@ -20,8 +21,8 @@ class TikTokParser(BaseParser):
         # 获取视频信息
         video_info = await yt_dlp_downloader.extract_video_info(url)
 
-        # 下载封面和视频
-        video = yt_dlp_downloader.download_video(url)
+        # 发送或渲染需要时才开始下载视频
+        video = partial(yt_dlp_downloader.download_video, url)
         video_content = self.create_video(
             video,
             video_info.thumbnail,
@@ -1,5 +1,6 @@
 import re
 from typing import ClassVar
+from functools import partial
 
 from httpx import AsyncClient
 
@@ -38,7 +39,8 @@ class YouTubeParser(BaseParser):
         )
 
         if video_info.duration <= pconfig.duration_maximum:
-            video = yt_dlp_downloader.download_video(url, self.cookies_file)
+            # 发送或渲染需要时才开始下载
+            video = partial(yt_dlp_downloader.download_video, url, self.cookies_file)
             result.video = self.create_video(
                 video,
                 video_info.thumbnail,
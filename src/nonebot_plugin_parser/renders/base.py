@@ -1,17 +1,24 @@
 import uuid
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Any, ClassVar
 from pathlib import Path
 from itertools import chain
-from collections.abc import AsyncGenerator
+from collections.abc import Callable, AsyncGenerator
 from typing_extensions import override
 
-import aiofiles
-
+from . import cache as card_cache
+from ..utils import async_atomic_write
 from ..config import pconfig
-from ..helper import UniHelper, UniMessage, ForwardNodeInner
+from ..helper import Image, UniHelper, UniMessage, ForwardNodeInner
 from ..parsers import ParseResult, AudioContent, ImageContent, VideoContent
+from .compress import compress_for_send
+from ..constants import ContentsOrder
 from ..exception import IgnoreException, DownloadException
+from ..parsers.data import MediaContent
+
+PREVIEW_TEXT_LENGTH = 120
+"""预览消息中正文摘要的最大长度"""
 
 
 class BaseRenderer(ABC):
@@ -33,65 +40,142 @@ class BaseRenderer(ABC):
 
     async def render_contents(self) -> AsyncGenerator[UniMessage[Any], None]:
         failed_count = 0
-        # 可合并的 Seg，例如 文字，图片
-        mergeable_segs: list[ForwardNodeInner] = []
-        # 不可合并的 Seg，例如 视频，语音
-        other_segs: list[ForwardNodeInner] = []
 
         def on_error(e: Exception):
             if not isinstance(e, IgnoreException):
                 nonlocal failed_count
                 failed_count += 1
 
-        for cont in chain(
-            self.result.contents,
-            self.result.repost.contents if self.result.repost else (),
-        ):
-            path = await cont.path_task.safe_get(on_error)
-            if path is None:
-                continue
-
-            match cont:
-                case VideoContent() as video:
-                    if video.gif_path and (gif_path := await video.gif_path.safe_get()):
-                        mergeable_segs.append(UniHelper.img_seg(gif_path))
-                    else:
-                        thumbnail = await video.cover.safe_get() if video.cover else None
-                        yield UniMessage(UniHelper.video_seg(path, thumbnail))
-                case AudioContent():
-                    yield UniMessage(UniHelper.record_seg(path))
-                case ImageContent():
-                    mergeable_segs.append(UniHelper.img_seg(path))
-
-        for cont in chain(
-            self.result.graphics,
-            self.result.repost.graphics if self.result.repost else (),
-        ):
-            if isinstance(cont, str):
-                mergeable_segs.append(cont)
-                continue
-
-            if path := await cont.path_task.safe_get(on_error):
-                img_seg = UniHelper.img_seg(path)
-                if cont.alt:
-                    img_seg += cont.alt
-                mergeable_segs.append(img_seg)
+        result, repost = self.result, self.result.repost
+        # (内容, 是否附加图片描述), 只有图文中的图片附加描述
+        items: list[tuple[MediaContent | str, bool]] = [
+            *((cont, False) for cont in chain(result.contents, repost.contents if repost else ())),
+            *((cont, True) for cont in chain(result.graphics, repost.graphics if repost else ())),
+        ]
+        # 下载按需开始, 这里一次性启动需要发送的媒体, 避免按顺序等待时逐个下载
+        for cont, _ in items:
+            if isinstance(cont, MediaContent):
+                cont.path_task.prefetch()
+            if isinstance(cont, VideoContent):
+                for task in (cont.cover, cont.gif_path):
+                    if task is not None:
+                        task.prefetch()
+        order = pconfig.contents_order
+        # 可合并的 Seg，例如 文字，图片，按序号排列；不可合并的 Seg (视频，语音) 就绪后直接发送
+        mergeable_segs: dict[int, ForwardNodeInner] = {}
+        # 尚未就绪的可合并内容数，非 strict 模式下归零后立即发送合并消息，不等待视频
+        pending = sum(self._maybe_mergeable(cont) for cont, _ in items)
+        merged = False
 
-        if mergeable_segs or other_segs:
-            if pconfig.need_forward_contents or len(other_segs) > 1 or (len(mergeable_segs) + len(other_segs)) > 4:
-                forward_msg = UniHelper.construct_forward_message(mergeable_segs + other_segs)
-                yield UniMessage(forward_msg)
-            else:
-                if mergeable_segs:
-                    yield UniMessage(mergeable_segs)
-                for other_seg in other_segs:
-                    yield UniMessage(other_seg)
+        async for index, seg, mergeable in self._iter_resolved(items, on_error, order):
+            if seg is not None:
+                if mergeable:
+                    mergeable_segs[index] = seg
+                else:
+                    yield UniMessage(seg)
+            pending -= self._maybe_mergeable(items[index][0])
+            if order is not ContentsOrder.strict and pending == 0 and not merged:
+                merged = True
+                if message := self._merge_segs(mergeable_segs):
+                    yield message
+
+        if not merged and (message := self._merge_segs(mergeable_segs)):
+            yield message
 
         if failed_count > 0:
             message = f"{failed_count} 项媒体下载失败"
             yield UniMessage(message)
             raise DownloadException(message)
 
+    async def _iter_resolved(
+        self,
+        items: list[tuple[MediaContent | str, bool]],
+        on_error: Callable[[Exception], None],
+        order: ContentsOrder,
+    ) -> AsyncGenerator[tuple[int, ForwardNodeInner | None, bool], None]:
+        """按发送顺序策略产出就绪的内容 (序号, 消息段, 是否可合并)"""
+        if order is ContentsOrder.strict:
+            for index, (cont, with_alt) in enumerate(items):
+                yield index, *await self._resolve_content(cont, on_error, with_alt)
+            return
+
+        async def resolve(index: int, cont: MediaContent | str, with_alt: bool):
+            return index, *await self._resolve_content(cont, on_error, with_alt)
+
+        # 下载任务在解析时已经启动，这里只是并发等待
+        # 提前结束时不取消这些任务，否则会连带取消共享的下载任务
+        tasks = [asyncio.create_task(resolve(index, *item)) for index, item in enumerate(items)]
+        if order is ContentsOrder.ready:
+            for future in asyncio.as_completed(tasks):
+                yield await future
+            return
+
+        # hybrid: 视频和语音之间保持原顺序，但不等待排在前面的图片
+        finished: set[int] = set()
+        held: dict[int, ForwardNodeInner] = {}
+        next_index = 0
+        for future in asyncio.as_completed(tasks):
+            index, seg, mergeable = await future
+            finished.add(index)
+            if seg is not None and not mergeable:
+                held[index] = seg
+            else:
+                yield index, seg, mergeable
+            while next_index < len(items) and (
+                next_index in finished or isinstance(items[next_index][0], str | ImageContent)
+            ):
+                if (seg := held.pop(next_index, None)) is not None:
+                    yield next_index, seg, False
+                next_index += 1
+
+    async def _resolve_content(
+        self,
+        cont: MediaContent | str,
+        on_error: Callable[[Exception], None],
+        with_alt: bool = False,
+    ) -> tuple[ForwardNodeInner | None, bool]:
+        """等待媒体下载完成并转换为消息段
+
+        Returns:
+            (消息段, 是否可合并)，下载失败时消息段为 None
+        """
+        if isinstance(cont, str):
+            return cont, True
+        if (path := await cont.path_task.safe_get(on_error)) is None:
+            return None, True
+
+        match cont:
+            case VideoContent() as video:
+                if video.gif_path and (gif_path := await video.gif_path.safe_get()):
+                    return UniHelper.img_seg(gif_path), True
+                thumbnail = await video.cover.safe_get() if video.cover else None
+                if thumbnail is not None:
+                    thumbnail = await compress_for_send(thumbnail)
+                return UniHelper.video_seg(path, thumbnail), False
+            case AudioContent():
+                return UniHelper.record_seg(path), False
+            case ImageContent():
+                img_seg = UniHelper.img_seg(await compress_for_send(path))
+                if with_alt and cont.alt:
+                    img_seg += cont.alt
+                return img_seg, True
+        return None, True
+
+    @staticmethod
+    def _maybe_mergeable(cont: MediaContent | str) -> bool:
+        """内容是否可能合并发送, GIF 视频转换成功时作为图片合并"""
+        return isinstance(cont, str | ImageContent) or (isinstance(cont, VideoContent) and cont.gif_path is not None)
+
+    @staticmethod
+    def _merge_segs(segs: dict[int, ForwardNodeInner]) -> UniMessage[Any] | None:
+        """按原顺序合并消息段, 需要时构造合并转发消息"""
+        if not segs:
+            return None
+        nodes = [segs[index] for index in sorted(segs)]
+        if pconfig.need_forward_contents or len(nodes) > 4:
+            return UniMessage(UniHelper.construct_forward_message(nodes))
+        return UniMessage(nodes)
+
     @property
     def append_url(self) -> bool:
         return pconfig.append_url
@@ -105,36 +189,98 @@ class ImageRenderer(BaseRenderer):
         """渲染图片"""
         raise NotImplementedError
 
+    async def render_pages(self) -> AsyncGenerator[bytes, None]:
+        """逐页渲染图片, 默认只有一页"""
+        yield await self.render_image()
+
     @override
     async def render_messages(self):
-        image_seg = await self.cache_or_render_image()
+        pages = self.cache_or_render_pages()
+        # 首页未在预览时限内完成时, 先发送预览
+        first_page = asyncio.ensure_future(anext(pages, None))
+        if pconfig.preview_timeout > 0:
+            done, _ = await asyncio.wait({first_page}, timeout=pconfig.preview_timeout)
+            if not done:
+                yield await self.render_preview()
 
-        msg = UniMessage(image_seg)
-        if self.append_url:
-            urls = (self.result.display_url, self.result.repost_display_url)
-            msg += "\n".join(url for url in urls if url)
-        yield msg
+        image_seg = await first_page
+        if image_seg is not None:
+            msg = UniMessage(image_seg)
+            if self.append_url:
+                urls = (self.result.display_url, self.result.repost_display_url)
+                msg += "\n".join(url for url in urls if url)
+            yield msg
+        async for image_seg in pages:
+            yield UniMessage(image_seg)
 
         # 媒体内容
         async for message in self.render_contents():
             yield message
 
-    async def cache_or_render_image(self):
-        """获取缓存图片"""
-        if self.result.render_image is None:
-            image_raw = await self.render_image()
-            image_path = await self.save_img(image_raw)
-            self.result.render_image = image_path
-            if pconfig.use_base64:
-                return UniHelper.img_seg(image_raw)
+    async def render_preview(self) -> UniMessage[Any]:
+        """预览消息: 标题、正文摘要和已下载完成的封面, 不等待任何下载"""
+        texts = [self.result.header]
+        if text := self.result.text:
+            texts.append(text if len(text) <= PREVIEW_TEXT_LENGTH else f"{text[:PREVIEW_TEXT_LENGTH]}…")
+        msg = UniMessage("\n".join(text for text in texts if text))
+
+        covers = self.result.all_grid_images
+        if covers and covers[0].done and (cover_path := await covers[0].safe_get()):
+            msg += UniHelper.img_seg(await compress_for_send(cover_path))
+        return msg
 
-        return UniHelper.img_seg(self.result.render_image)
+    async def cache_or_render_pages(self) -> AsyncGenerator[Image, None]:
+        """获取缓存图片, 未缓存时逐页渲染, 每页渲染完成后立即返回"""
+        key: str | None = None
+        if not self.result.render_images:
+            # 缓存键由媒体来源计算, 命中时不下载任何媒体
+            key = card_cache.card_cache_key(self.result, type(self).__qualname__, self.not_repost)
+            if key is not None and (pages := card_cache.load_pages(key)):
+                self.result.render_images = pages
+            else:
+                # 卡片需要头像、图片和封面
+                self.result.prefetch(img_only=True)
+
+        if self.result.render_images:
+            for image_path in self.result.render_images:
+                yield UniHelper.img_seg(image_path)
+            return
+
+        image_paths: list[Path] = []
+        async for image_raw in self.render_pages():
+            image_path = await self.save_img(image_raw, key, len(image_paths))
+            image_paths.append(image_path)
+            yield UniHelper.img_seg(image_raw if pconfig.use_base64 else image_path)
+
+        # 全部页面渲染完成后再缓存
+        self.result.render_images = image_paths
+        if key is not None and not card_cache.media_failed(self.result):
+            card_cache.save_pages(key, image_paths)
 
     @classmethod
-    async def save_img(cls, raw: bytes) -> Path:
-        """保存图片"""
-        file_name = f"{uuid.uuid4().hex}.png"
-        image_path = pconfig.cache_dir / file_name
-        async with aiofiles.open(image_path, "wb+") as f:
-            await f.write(raw)
+    async def save_img(cls, raw: bytes, key: str | None = None, index: int = 0) -> Path:
+        """保存图片, 扩展名与图片格式一致
+
+        Args:
+            raw: 图片数据
+            key: 卡片缓存键, 为 None 时使用随机文件名保存到缓存目录
+            index: 页码
+        """
+        suffix = cls.guess_suffix(raw)
+        if key is None:
+            image_path = pconfig.cache_dir / f"{uuid.uuid4().hex}{suffix}"
+        else:
+            image_path = card_cache.page_path(key, index, suffix)
+            image_path.parent.mkdir(parents=True, exist_ok=True)
+        # 同一卡片并发渲染时不会互相覆盖或读到不完整的页面
+        await async_atomic_write(image_path, lambda f: f.write(raw))
         return image_path
+
+    @staticmethod
+    def guess_suffix(raw: bytes) -> str:
+        """根据文件头判断图片扩展名, 未知格式视为 PNG"""
+        if raw[:3] == b"\xff\xd8\xff":
+            return ".jpg"
+        if raw[:4] == b"RIFF" and raw[8:12] == b"WEBP":
+            return ".webp"
+        return ".png"
@@ -0,0 +1,184 @@
+"""渲染结果持久化缓存 - 以解析结果内容与渲染配置的哈希为键, 重启或结果缓存失效后相同的卡片无需重新渲染"""
+
+import json
+import time
+import hashlib
+from typing import Any
+from pathlib import Path
+from collections.abc import Iterator
+
+from nonebot import logger
+
+from ..config import pconfig
+from ..parsers import ParseResult, AudioContent, ImageContent, VideoContent
+from ..parsers.task import PathTask
+
+CARD_CACHE_VERSION = 2
+"""卡片布局变化时递增, 使旧缓存失效"""
+CARD_CACHE_DIR = pconfig.cache_dir / "cards"
+"""卡片缓存目录, 不受每日缓存清理影响, 按大小和时间淘汰"""
+MANIFEST_SUFFIX = ".json"
+ORPHAN_TTL = 3600
+"""没有清单的页面 (渲染中断) 保留的秒数"""
+
+
+def _iter_tasks(result: ParseResult) -> Iterator[PathTask]:
+    """卡片使用的媒体: 头像、图片、视频封面和图文中的图片, 不包括转发内容"""
+    if result.author and result.author.avatar:
+        yield result.author.avatar
+    for cont in result.contents:
+        match cont:
+            case VideoContent(cover=PathTask() as cover):
+                # 卡片只使用封面, 不等待视频下载
+                yield cover
+            case ImageContent():
+                yield cont.path_task
+    for item in result.graphics:
+        if not isinstance(item, str):
+            yield item.path_task
+
+
+def _describe(result: ParseResult) -> dict[str, Any] | None:
+    """卡片内容的描述, 媒体使用来源 (URL) 标识, 不等待下载; 有媒体无法标识时返回 None"""
+    media: list[Any] = []
+    for cont in result.contents:
+        match cont:
+            case VideoContent():
+                media.append(("video", cont.duration, cont.is_gif))
+            case ImageContent():
+                media.append(("image", cont.alt))
+            case AudioContent():
+                media.append(("audio", cont.duration))
+
+    graphics: list[Any] = []
+    for item in result.graphics:
+        graphics.append(item if isinstance(item, str) else ("image", item.alt))
+
+    # 没有来源的任务只能使用已下载完成的文件名
+    sources: list[str] = []
+    for task in _iter_tasks(result):
+        if task.source is not None:
+            sources.append(task.source)
+        elif task.path is not None:
+            sources.append(task.path.name)
+        else:
+            return None
+
+    repost = None
+    if result.repost is not None and (repost := _describe(result.repost)) is None:
+        return None
+
+    return {
+        "platform": result.platform.name,
+        "author": (result.author.name, result.author.description) if result.author else None,
+        "title": result.title,
+        "text": result.text,
+        "timestamp": result.timestamp,
+        "extra": result.extra_info,
+        "content_type": result.content_type,
+        "media": media,
+        "graphics": graphics,
+        "sources": sources,
+        "repost": repost,
+    }
+
+
+def media_failed(result: ParseResult) -> bool:
+    """卡片使用的媒体是否有下载失败的, 渲染完成后检查, 使用了占位图片的卡片不持久化"""
+    if any(task.failed for task in _iter_tasks(result)):
+        return True
+    return result.repost is not None and media_failed(result.repost)
+
+
+def _settings() -> dict[str, Any]:
+    """影响卡片外观的配置"""
+    font = pconfig.custom_font
+    return {
+        "font": (font.name, font.stat().st_mtime_ns) if font else None,
+        "font_weight": pconfig.custom_font_weight,
+        "format": (pconfig.card_format, pconfig.card_quality, pconfig.card_compress_level, pconfig.card_quantize),
+        "max_size": pconfig.card_max_size,
+        "max_height": pconfig.card_max_height,
+        "emoji": (pconfig.emoji_style, pconfig.parser_emoji_dir),
+    }
+
+
+def card_cache_key(result: ParseResult, renderer: str, not_repost: bool) -> str | None:
+    """计算卡片缓存键, 不等待媒体下载, 内容无法确定 (媒体没有来源) 时返回 None, 此时不持久化"""
+    if (content := _describe(result)) is None:
+        return None
+
+    payload = [CARD_CACHE_VERSION, renderer, not_repost, _settings(), content]
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def page_path(key: str, index: int, suffix: str) -> Path:
+    return CARD_CACHE_DIR / f"{key}_{index}{suffix}"
+
+
+def load_pages(key: str) -> list[Path] | None:
+    """读取已缓存的全部页面, 命中时刷新修改时间, 用于按时间淘汰"""
+    manifest = CARD_CACHE_DIR / f"{key}{MANIFEST_SUFFIX}"
+    try:
+        pages = [CARD_CACHE_DIR / name for name in json.loads(manifest.read_text())]
+    except (OSError, ValueError):
+        return None
+
+    if not pages or not all(page.exists() for page in pages):
+        return None
+    manifest.touch()
+    return pages
+
+
+def save_pages(key: str, pages: list[Path]) -> None:
+    """全部页面写入后再写入清单, 清单存在即代表缓存完整"""
+    manifest = CARD_CACHE_DIR / f"{key}{MANIFEST_SUFFIX}"
+    manifest.write_text(json.dumps([page.name for page in pages]))
+
+
+def prune_card_cache() -> None:
+    """删除过期的卡片, 总大小超出上限时从最久未使用的开始删除"""
+    if not CARD_CACHE_DIR.exists():
+        return
+
+    now = time.time()
+    max_age = pconfig.card_cache_max_age * 86400
+    budget = pconfig.card_cache_max_size * 1024 * 1024
+
+    files: dict[str, list[Path]] = {}
+    manifests: dict[str, float] = {}
+    for path in CARD_CACHE_DIR.iterdir():
+        key = path.stem.partition("_")[0]
+        files.setdefault(key, []).append(path)
+        if path.suffix == MANIFEST_SUFFIX:
+            manifests[key] = path.stat().st_mtime
+
+    removed = 0
+    total = 0
+    kept: list[tuple[float, str, int]] = []
+    for key, paths in files.items():
+        mtime = manifests.get(key)
+        expired = now - mtime > max_age if mtime is not None else now - paths[0].stat().st_mtime > ORPHAN_TTL
+        if expired:
+            removed += _remove(paths)
+            continue
+        if mtime is not None:
+            size = sum(path.stat().st_size for path in paths)
+            kept.append((mtime, key, size))
+            total += size
+
+    for _, key, size in sorted(kept):
+        if total <= budget:
+            break
+        removed += _remove(files[key])
+        total -= size
+
+    if removed:
+        logger.info(f"已清理 {removed} 个卡片缓存文件, 剩余 {total / 1024 / 1024:.1f} MB")
+
+
+def _remove(paths: list[Path]) -> int:
+    for path in paths:
+        path.unlink(missing_ok=True)
+    return len(paths)
@@ -1,14 +1,23 @@
 from __future__ import annotations
 
-from PIL import Image
+from typing import TypeVar
+from pathlib import Path
+from functools import lru_cache
+from threading import Lock
+from collections.abc import Callable
+
+from PIL import Image, ImageDraw, ImageFont
 from nonebot import logger, get_driver
 from apilmoji import EmojiCDNSource
 
 from .. import resources
 from .font import CardFonts, CardTheme
+from .atlas import EmojiAtlas
+from ...utils import LimitedSizeDict
 from ...config import pconfig
 
 PILImage = Image.Image
+_ImageT = TypeVar("_ImageT", PILImage, PILImage | None)
 
 # apilmoji emoji 源
 EMOJI_SOURCE = EmojiCDNSource(
@@ -26,12 +35,20 @@ DEFAULT_THEME = CardTheme(
 )
 
 AVATAR_SIZE = 80
+VIDEO_BUTTON_SIZE = 100
+INDICATOR_FONT_SIZE = 60
 FONTS: CardFonts
 PLATFORM_LOGOS: dict[str, PILImage]
 AVATAR_IMAGE: PILImage
 VIDEO_BUTTON_IMAGE: PILImage
+EMOJI_ATLAS: EmojiAtlas | None = None
 
 _resources_loaded = False
+_scaled_fonts: dict[float, CardFonts] = {}
+
+# 处理完成、可直接粘贴的图片, 键为 (源路径, 目标尺寸)
+_image_cache: LimitedSizeDict[tuple[Path, tuple], PILImage] = LimitedSizeDict(max_size=64)
+_image_cache_lock = Lock()
 
 
 @get_driver().on_startup
@@ -47,7 +64,7 @@ def ensure_resources() -> None:
 
 def load_resources() -> None:
     """加载渲染资源（幂等）"""
-    global _resources_loaded, FONTS, PLATFORM_LOGOS, AVATAR_IMAGE, VIDEO_BUTTON_IMAGE
+    global _resources_loaded, FONTS, PLATFORM_LOGOS, AVATAR_IMAGE, VIDEO_BUTTON_IMAGE, EMOJI_ATLAS
 
     if _resources_loaded:
         return
@@ -56,13 +73,21 @@ def load_resources() -> None:
     PLATFORM_LOGOS = _load_platform_logos()
     AVATAR_IMAGE = _load_default_avatar()
     VIDEO_BUTTON_IMAGE = _load_video_button()
+    get_avatar_mask(AVATAR_SIZE)
+    get_indicator_font(INDICATOR_FONT_SIZE)
+    if emoji_dir := pconfig.emoji_dir:
+        EMOJI_ATLAS = EmojiAtlas(emoji_dir)
 
     _resources_loaded = True
 
 
+def _font_path() -> Path:
+    return pconfig.custom_font or resources.DEFAULT_FONT_PATH
+
+
 def _load_fonts() -> CardFonts:
     """字体（昵称 / 标题 / 正文 / 辅助文案）"""
-    font_path = pconfig.custom_font or resources.DEFAULT_FONT_PATH
+    font_path = _font_path()
     loaded = CardFonts.load(font_path, DEFAULT_THEME)
     logger.success(f"加载字体「{font_path.name}」成功")
     return loaded
@@ -95,9 +120,73 @@ def _load_default_avatar() -> PILImage:
 def _load_video_button() -> PILImage:
     """视频播放按钮（封面居中叠加，半透明）"""
     with Image.open(resources.DEFAULT_VIDEO_BUTTON_PATH) as img:
-        button = img.convert("RGBA").resize((100, 100))
+        button = img.convert("RGBA").resize((VIDEO_BUTTON_SIZE, VIDEO_BUTTON_SIZE))
     alpha = button.split()[-1]
     alpha = alpha.point(lambda x: int(x * 0.6))
     button.putalpha(alpha)
     logger.debug(f"加载视频播放按钮「{resources.DEFAULT_VIDEO_BUTTON_PATH.name}」成功")
     return button
+
+
+def cached_image(path: Path, size: tuple, loader: Callable[[], _ImageT]) -> _ImageT:
+    """获取处理完成的图片, 未命中时调用 loader 并缓存
+
+    缓存的图片会被多次粘贴, 调用方不能修改
+    """
+    key = (path, size)
+    with _image_cache_lock:
+        if (image := _image_cache.get(key)) is not None:
+            _image_cache.move_to_end(key)
+            return image
+
+    if (image := loader()) is not None:
+        with _image_cache_lock:
+            _image_cache[key] = image
+    return image
+
+
+def get_fonts(scale: float = 1.0) -> CardFonts:
+    """按缩放比例获取卡片字体"""
+    if scale == 1:
+        return FONTS
+
+    key = round(scale, 4)
+    if (fonts := _scaled_fonts.get(key)) is None:
+        fonts = _scaled_fonts[key] = CardFonts.load(_font_path(), DEFAULT_THEME, key)
+    return fonts
+
+
+@lru_cache(maxsize=8)
+def get_avatar_mask(size: int) -> PILImage:
+    """头像圆形遮罩"""
+    mask = Image.new("L", (size, size), 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, size - 1, size - 1), fill=255)
+    return mask
+
+
+@lru_cache(maxsize=8)
+def get_indicator_font(size: int) -> ImageFont.FreeTypeFont:
+    """+N 指示器字体, 统一使用默认字体"""
+    return ImageFont.truetype(resources.DEFAULT_FONT_PATH, size)
+
+
+def get_default_avatar(size: int) -> PILImage:
+    """指定尺寸的默认头像"""
+    if size == AVATAR_SIZE:
+        return AVATAR_IMAGE
+    return cached_image(
+        resources.DEFAULT_AVATAR_PATH,
+        (size, size),
+        lambda: AVATAR_IMAGE.resize((size, size), Image.Resampling.LANCZOS),
+    )
+
+
+def get_video_button(size: int) -> PILImage:
+    """指定尺寸的视频播放按钮"""
+    if size == VIDEO_BUTTON_SIZE:
+        return VIDEO_BUTTON_IMAGE
+    return cached_image(
+        resources.DEFAULT_VIDEO_BUTTON_PATH,
+        (size, size),
+        lambda: VIDEO_BUTTON_IMAGE.resize((size, size), Image.Resampling.LANCZOS),
+    )
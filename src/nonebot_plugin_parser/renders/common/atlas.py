@@ -0,0 +1,61 @@
+"""离线 emoji 图集"""
+
+import re
+from pathlib import Path
+
+from PIL import Image
+from nonebot import logger
+
+PILImage = Image.Image
+
+ATLAS_SUFFIXES = (".png", ".webp")
+"""图集支持的图片格式"""
+VARIATION_SELECTOR = "\ufe0f"
+
+
+def parse_emoji_file_name(stem: str) -> str | None:
+    """将码位文件名解析为 emoji, 例如 1f468-200d-1f469 (twemoji) / emoji_u1f600 (noto)"""
+    stem = stem.removeprefix("emoji_u").removeprefix("u")
+    try:
+        chars = "".join(chr(int(part, 16)) for part in re.split(r"[-_ ]", stem) if part)
+    except (ValueError, OverflowError):
+        return None
+    return chars.replace(VARIATION_SELECTOR, "") or None
+
+
+class EmojiAtlas:
+    """本地目录中的 emoji 图片, 首次使用时解码并常驻内存, 渲染时无需访问 CDN"""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._paths: dict[str, Path] = {}
+        self._images: dict[str, PILImage] = {}
+        self._sized: dict[tuple[str, int], PILImage] = {}
+
+        for path in directory.iterdir():
+            if path.suffix.lower() in ATLAS_SUFFIXES and (char := parse_emoji_file_name(path.stem)):
+                self._paths[char] = path
+        logger.success(f"加载离线 emoji 图集「{directory}」成功, 共 {len(self._paths)} 个")
+
+    def __contains__(self, char: str) -> bool:
+        return char.replace(VARIATION_SELECTOR, "") in self._paths
+
+    def get(self, char: str, size: int) -> PILImage | None:
+        """获取缩放到 size 的 emoji 图像, 图集中不存在时返回 None"""
+        char = char.replace(VARIATION_SELECTOR, "")
+        if (sized := self._sized.get((char, size))) is not None:
+            return sized
+
+        if (image := self._images.get(char)) is None:
+            if (path := self._paths.get(char)) is None:
+                return None
+            try:
+                with Image.open(path) as img:
+                    image = self._images[char] = img.convert("RGBA")
+            except Exception:
+                logger.opt(exception=True).warning(f"解码 emoji 图片「{path.name}」失败")
+                del self._paths[char]
+                return None
+
+        sized = self._sized[(char, size)] = image.resize((size, size), Image.Resampling.LANCZOS)
+        return sized
@@ -0,0 +1,79 @@
+"""按目标尺寸降采样解码图片"""
+
+from math import ceil
+from pathlib import Path
+
+from PIL import Image
+
+PILImage = Image.Image
+
+MAX_DECODE_PIXELS = 30_000_000
+"""降采样后仍超过该像素数的图片不再解码, 防止超长图/解压炸弹占满内存"""
+REDUCING_GAP = 2.0
+"""reduce 后至少保留目标尺寸的倍数, 留给最终的 LANCZOS 重采样"""
+LONG_IMAGE_MIN_SCALE = 0.75
+"""超长图按 DCT 缩放解码允许的最小宽度 (相对目标宽度), 裁剪后轻微放大"""
+
+
+class DecodeLimitError(ValueError):
+    """图片像素数超过解码上限"""
+
+
+def decode_image(
+    path: Path,
+    width: int,
+    height: int | None = None,
+    *,
+    cover: bool = False,
+    max_height: int | None = None,
+) -> PILImage:
+    """解码图片, 尽量在解码阶段缩小到接近目标尺寸
+
+    JPEG 使用 draft() 按 DCT 缩放解码, 其余格式解码后使用 reduce() 整数倍缩小,
+    返回的图片不小于目标尺寸的 REDUCING_GAP 倍 (原图更小时保持原图),
+    由调用方完成最终缩放
+
+    Args:
+        path: 图片路径
+        width: 目标宽度
+        height: 目标高度, 为 None 时只按宽度计算
+        cover: 为 True 时按填满目标尺寸计算缩放比例 (裁剪/拉伸), 否则按完整放入计算
+        max_height: 缩放后的最大高度, 超长图只保留顶部; 解码仍受 MAX_DECODE_PIXELS 限制, 之后再裁剪
+    """
+    img = Image.open(path)
+    try:
+        src_w, src_h = img.size
+        ratio = width / src_w
+        if height is not None:
+            pick = max if cover else min
+            ratio = pick(ratio, height / src_h)
+
+        # 超长图只保留顶部的 keep_rows 行
+        keep_rows: int | None = None
+        draft_scale = REDUCING_GAP
+        if max_height is not None and src_h * ratio > max_height:
+            keep_rows = ceil(max_height / ratio)
+            # 允许更小的解码比例 (仅 JPEG 生效), 避免按原尺寸解码整张超长图
+            draft_scale = LONG_IMAGE_MIN_SCALE
+
+        if ratio * draft_scale < 1:
+            # JPEG 按 1/2、1/4、1/8 缩放解码, 结果不小于请求的尺寸
+            size = img.size
+            img.draft(img.mode, (ceil(size[0] * ratio * draft_scale), ceil(size[1] * ratio * draft_scale)))
+
+        if img.width * img.height > MAX_DECODE_PIXELS:
+            raise DecodeLimitError(f"图片 {path.name} 尺寸 {src_w}x{src_h} 超过解码上限")
+
+        img.load()
+        out = img
+        if keep_rows is not None:
+            out = img.crop((0, 0, img.width, ceil(keep_rows * img.height / src_h)))
+            if out.width < (target_w := ceil(src_w * ratio)):
+                out = out.resize((target_w, ceil(out.height * target_w / out.width)), Image.Resampling.LANCZOS)
+        # draft 之后剩余的缩小倍数
+        factor = int(out.width / (src_w * ratio * REDUCING_GAP)) if ratio < 1 else 1
+        if factor >= 2:
+            return out.reduce(factor)
+        return out if out is not img else img.copy()
+    finally:
+        img.close()
@@ -0,0 +1,70 @@
+"""卡片输出编码"""
+
+from io import BytesIO
+from typing import Any
+from collections.abc import Iterator
+
+from PIL import Image
+from nonebot import logger
+
+from ...config import pconfig
+from ...constants import ImageFormat
+
+PILImage = Image.Image
+
+FALLBACK_QUALITIES = (75, 60, 45)
+"""超出大小预算时依次尝试的有损编码质量"""
+
+Encoding = tuple[ImageFormat, dict[str, Any]]
+
+
+def _save(image: PILImage, fmt: ImageFormat, params: dict[str, Any]) -> bytes:
+    output = BytesIO()
+    if params.pop("quantize", False):
+        image = image.quantize(256, method=Image.Quantize.FASTOCTREE)
+    image.save(output, format=fmt.value.upper(), **params)
+    return output.getvalue()
+
+
+def _iter_encodings() -> Iterator[Encoding]:
+    """按配置生成候选编码, 首个为配置的编码, 之后体积依次减小、损失依次增大"""
+    fmt = pconfig.card_format
+    quality = pconfig.card_quality
+    quantize = pconfig.card_quantize
+
+    if fmt == ImageFormat.png:
+        yield fmt, {"compress_level": pconfig.card_compress_level, "quantize": quantize}
+    else:
+        yield fmt, {"quality": quality}
+
+    if pconfig.card_max_size <= 0:
+        return
+
+    if fmt == ImageFormat.png and not quantize:
+        yield fmt, {"compress_level": pconfig.card_compress_level, "quantize": True}
+
+    lossy = ImageFormat.webp if fmt == ImageFormat.webp else ImageFormat.jpeg
+    qualities = [quality] if fmt == ImageFormat.png else []
+    qualities += [q for q in FALLBACK_QUALITIES if q < quality]
+    for q in qualities:
+        yield lossy, {"quality": q}
+
+
+def encode_card(image: PILImage) -> bytes:
+    """按配置编码卡片
+
+    设置了 `parser_card_max_size` 时, 返回第一个不超过预算的编码, 都超出时返回最小的编码
+    """
+    budget = pconfig.card_max_size * 1024
+    smallest: bytes | None = None
+
+    for fmt, params in _iter_encodings():
+        data = _save(image, fmt, params)
+        if budget <= 0 or len(data) <= budget:
+            return data
+        if smallest is None or len(data) < len(smallest):
+            smallest = data
+
+    assert smallest is not None
+    logger.warning(f"卡片最小编码 {len(smallest) / 1024:.0f} KB 仍超过预算 {pconfig.card_max_size} KB")
+    return smallest
@@ -1,40 +1,168 @@
 from __future__ import annotations
 
+import struct
+from array import array
 from pathlib import Path
 from functools import lru_cache
-from dataclasses import dataclass
+from dataclasses import field, dataclass
 
 from PIL import ImageFont
+from nonebot import logger
 from apilmoji.core import get_font_height
 
 Color = tuple[int, int, int]
 
+BMP_SIZE = 0x10000
+MISSING_WIDTH = 0xFFFF
+"""字宽表中缺失字形的占位值"""
+
+
+def _parse_cmap(data: bytes, cmap: int) -> dict[int, int]:
+    """解析 cmap 表, 返回 码位 -> 字形索引, 支持 format 4 / 12"""
+    (num_subtables,) = struct.unpack_from(">H", data, cmap + 2)
+    subtables: dict[tuple[int, int], int] = {}
+    for i in range(num_subtables):
+        platform_id, encoding_id, offset = struct.unpack_from(">HHI", data, cmap + 4 + i * 8)
+        subtables[(platform_id, encoding_id)] = cmap + offset
+
+    # 优先使用覆盖完整 Unicode 的子表
+    for key in ((3, 10), (0, 6), (0, 4), (3, 1), (0, 3), (0, 2), (0, 1), (0, 0)):
+        if (offset := subtables.get(key)) is None:
+            continue
+        (fmt,) = struct.unpack_from(">H", data, offset)
+        if fmt == 12:
+            return _parse_cmap_format12(data, offset)
+        if fmt == 4:
+            return _parse_cmap_format4(data, offset)
+
+    raise ValueError("未找到支持的 cmap 子表")
+
+
+def _parse_cmap_format4(data: bytes, offset: int) -> dict[int, int]:
+    (seg_count_x2,) = struct.unpack_from(">H", data, offset + 6)
+    seg_count = seg_count_x2 // 2
+    end_codes = struct.unpack_from(f">{seg_count}H", data, offset + 14)
+    start_codes = struct.unpack_from(f">{seg_count}H", data, offset + 16 + seg_count_x2)
+    id_deltas = struct.unpack_from(f">{seg_count}h", data, offset + 16 + seg_count_x2 * 2)
+    range_offsets_pos = offset + 16 + seg_count_x2 * 3
+    id_range_offsets = struct.unpack_from(f">{seg_count}H", data, range_offsets_pos)
+
+    mapping: dict[int, int] = {}
+    for i in range(seg_count):
+        start, end, delta, range_offset = start_codes[i], end_codes[i], id_deltas[i], id_range_offsets[i]
+        if start == 0xFFFF:
+            continue
+        if range_offset == 0:
+            for code in range(start, end + 1):
+                mapping[code] = (code + delta) & 0xFFFF
+            continue
+        glyphs_pos = range_offsets_pos + i * 2 + range_offset
+        glyphs = struct.unpack_from(f">{end - start + 1}H", data, glyphs_pos)
+        for code, glyph in zip(range(start, end + 1), glyphs):
+            if glyph:
+                mapping[code] = (glyph + delta) & 0xFFFF
+    return mapping
+
+
+def _parse_cmap_format12(data: bytes, offset: int) -> dict[int, int]:
+    (num_groups,) = struct.unpack_from(">I", data, offset + 12)
+    mapping: dict[int, int] = {}
+    for start, end, start_glyph in struct.iter_unpack(">III", data[offset + 16 : offset + 16 + num_groups * 12]):
+        for code in range(start, end + 1):
+            mapping[code] = start_glyph + code - start
+    return mapping
+
+
+@lru_cache(maxsize=4)
+def load_glyph_advances(font_path: Path) -> tuple[int, dict[int, int]]:
+    """读取字体 cmap 中所有码位的字形步进宽度
+
+    返回 (unitsPerEm, 码位 -> 步进宽度(字体单位)), TTC 使用第一个字体
+    """
+    data = font_path.read_bytes()
+
+    sfnt = 0
+    if data[:4] == b"ttcf":
+        (sfnt,) = struct.unpack_from(">I", data, 12)
+
+    (num_tables,) = struct.unpack_from(">H", data, sfnt + 4)
+    tables: dict[bytes, int] = {}
+    for i in range(num_tables):
+        tag, _, offset, _ = struct.unpack_from(">4sIII", data, sfnt + 12 + i * 16)
+        tables[tag] = offset
+
+    (units_per_em,) = struct.unpack_from(">H", data, tables[b"head"] + 18)
+    (num_h_metrics,) = struct.unpack_from(">H", data, tables[b"hhea"] + 34)
+    # longHorMetric: advanceWidth(uint16) + lsb(int16), 只取 advanceWidth
+    advances = struct.unpack_from(f">{num_h_metrics * 2}H", data, tables[b"hmtx"])[::2]
+    last_advance = advances[-1]
+
+    cmap = _parse_cmap(data, tables[b"cmap"])
+    return units_per_em, {
+        code: advances[glyph] if glyph < num_h_metrics else last_advance for code, glyph in cmap.items()
+    }
+
+
+def _build_width_table(font_path: Path, size: int) -> tuple[array, dict[int, int]]:
+    """按字号生成字宽表, BMP 使用紧凑数组, 其余码位使用字典"""
+    try:
+        units_per_em, advances = load_glyph_advances(font_path)
+    except Exception:
+        logger.opt(exception=True).warning(f"解析字体「{font_path.name}」字宽失败, 将逐字测量")
+        return array("H"), {}
+
+    scale = size / units_per_em
+    pixels = {advance: round(advance * scale) for advance in set(advances.values())}
+
+    bmp = array("H", [MISSING_WIDTH]) * BMP_SIZE
+    astral: dict[int, int] = {}
+    for code, advance in advances.items():
+        if code < BMP_SIZE:
+            bmp[code] = pixels[advance]
+        else:
+            astral[code] = pixels[advance]
+    return bmp, astral
+
 
 @dataclass(eq=False, frozen=True, slots=True)
 class FontMetrics:
-    """字体度量（换行、估高）"""
+    """字体度量（换行、估高）
+
+    字宽来自加载时生成的步进宽度表, 表中缺失的字符使用 getlength 测量并记录
+    """
 
     font: ImageFont.FreeTypeFont
     line_height: int
     cjk_width: int
+    widths: array = field(default_factory=lambda: array("H"), repr=False)
+    """BMP 码位的字宽, 缺失为 MISSING_WIDTH"""
+    extra_widths: dict[int, int] = field(default_factory=dict, repr=False)
+    """BMP 以外码位以及缺失字符的字宽"""
 
-    def __hash__(self) -> int:
-        return hash((id(self.font), self.line_height, self.cjk_width))
+    def _measure_code(self, code: int) -> int:
+        width = self.extra_widths.get(code)
+        if width is None:
+            width = self.extra_widths[code] = int(self.font.getlength(chr(code)))
+        return width
 
-    @lru_cache(maxsize=500)
     def get_char_width(self, char: str) -> int:
-        bbox = self.font.getbbox(char)
-        return int(bbox[2] - bbox[0])
+        code = ord(char)
+        if code < len(self.widths) and (width := self.widths[code]) != MISSING_WIDTH:
+            return width
+        return self._measure_code(code)
 
-    def get_char_width_fast(self, char: str) -> int:
-        if "\u4e00" <= char <= "\u9fff":
-            return self.cjk_width
-        return self.get_char_width(char)
+    get_char_width_fast = get_char_width
 
     def get_text_width(self, text: str) -> int:
-        if not text:
-            return 0
-        return sum(self.get_char_width_fast(char) for char in text)
+        widths = self.widths
+        size = len(widths)
+        total = 0
+        for code in map(ord, text):
+            if code < size and (width := widths[code]) != MISSING_WIDTH:
+                total += width
+            else:
+                total += self._measure_code(code)
+        return total
 
 
 @dataclass(frozen=True, slots=True)
@@ -57,11 +185,14 @@ class StyledFont:
 
 def _load_styled(font_path: Path, size: int, fill: Color) -> StyledFont:
     font = ImageFont.truetype(font_path, size)
+    widths, extra_widths = _build_width_table(font_path, size)
     return StyledFont(
         metrics=FontMetrics(
             font=font,
             line_height=get_font_height(font),
             cjk_width=size,
+            widths=widths,
+            extra_widths=extra_widths,
         ),
         fill=fill,
     )
@@ -77,10 +208,10 @@ class CardFonts:
     muted: StyledFont
 
     @classmethod
-    def load(cls, font_path: Path, theme: CardTheme) -> CardFonts:
+    def load(cls, font_path: Path, theme: CardTheme, scale: float = 1.0) -> CardFonts:
         return cls(
-            name=_load_styled(font_path, 28, theme.name),
-            title=_load_styled(font_path, 30, theme.title),
-            body=_load_styled(font_path, 24, theme.body),
-            muted=_load_styled(font_path, 24, theme.muted),
+            name=_load_styled(font_path, round(28 * scale), theme.name),
+            title=_load_styled(font_path, round(30 * scale), theme.title),
+            body=_load_styled(font_path, round(24 * scale), theme.body),
+            muted=_load_styled(font_path, round(24 * scale), theme.muted),
         )
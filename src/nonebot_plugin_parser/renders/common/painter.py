@@ -0,0 +1,797 @@
+from __future__ import annotations
+
+import os
+from math import ceil
+from bisect import bisect_right
+from typing import TypeVar, ClassVar
+from pathlib import Path
+from functools import partial
+from threading import Lock
+from collections import deque
+from dataclasses import field, dataclass
+from collections.abc import Callable, Iterator, Generator
+from concurrent.futures import Future, Executor, ThreadPoolExecutor
+
+import emoji
+from PIL import Image, ImageOps, ImageDraw
+from nonebot import logger
+
+from . import assets
+from .. import resources
+from .font import StyledFont, FontMetrics
+from .decode import DecodeLimitError, decode_image
+from .encode import encode_card
+
+Color = tuple[int, int, int]
+PILImage = Image.Image
+PILImageDraw = ImageDraw.ImageDraw
+EmojiSprites = dict[tuple[str, int], PILImage]
+"""预渲染的 emoji 图像, 键为 (emoji, 字号)"""
+T = TypeVar("T")
+
+DECODE_WORKERS = 4
+"""解码图片的线程数, 同一进程内的所有卡片共用"""
+
+_decode_pool: ThreadPoolExecutor | None = None
+_decode_pool_pid = 0
+_decode_pool_lock = Lock()
+
+
+def get_decode_pool() -> ThreadPoolExecutor:
+    """获取解码线程池, 在 fork 出的渲染进程中首次使用时重新创建"""
+    global _decode_pool, _decode_pool_pid
+
+    with _decode_pool_lock:
+        if _decode_pool is None or _decode_pool_pid != os.getpid():
+            _decode_pool = ThreadPoolExecutor(DECODE_WORKERS, thread_name_prefix="parser-decode")
+            _decode_pool_pid = os.getpid()
+        return _decode_pool
+
+
+@dataclass(slots=True)
+class GraphicsImage:
+    """图文中的图片"""
+
+    path: Path | None
+    alt: str | None = None
+
+
+@dataclass(slots=True)
+class CardData:
+    """卡片绘制数据, 只包含路径和文本, 可以传递给渲染进程"""
+
+    platform: str
+    author: str | None = None
+    has_avatar: bool = False
+    avatar: Path | None = None
+    datetime: str | None = None
+    title: str | None = None
+    text: str | None = None
+    extra: str | None = None
+    is_video: bool = False
+    cover: Path | None = None
+    grid: list[Path | None] = field(default_factory=list)
+    grid_total: int = 0
+    graphics: list[str | GraphicsImage] = field(default_factory=list)
+    repost: CardData | None = None
+
+    def iter_styled_texts(self, scale: float = 1.0) -> Iterator[tuple[str, StyledFont]]:
+        """遍历需要绘制 emoji 的文本及其字体, 转发内容使用缩放后的字体"""
+        fonts = assets.get_fonts(scale)
+        if self.title:
+            yield self.title, fonts.title
+        for item in self.graphics:
+            if isinstance(item, str):
+                yield item, fonts.body
+        if self.text:
+            yield self.text, fonts.body
+        if self.extra:
+            yield self.extra, fonts.muted
+        if self.repost:
+            yield from self.repost.iter_styled_texts(scale * CardPainter.REPOST_SCALE)
+
+
+def paint_card(card: CardData, emojis: EmojiSprites, not_repost: bool = True) -> bytes:
+    """绘制卡片并按配置编码 (同步, 在渲染池中执行)"""
+    assets.ensure_resources()
+    # Pillow 解码/缩放时释放 GIL, 线程即可并行
+    image = CardPainter(card, emojis, not_repost, get_decode_pool()).paint()
+    return encode_card(image)
+
+
+def iter_card_pages(
+    card: CardData,
+    emojis: EmojiSprites,
+    not_repost: bool = True,
+    max_height: int = 0,
+) -> Generator[bytes, None, None]:
+    """逐页绘制卡片并按配置编码 (同步生成器, 在渲染池中逐页执行)"""
+    assets.ensure_resources()
+    for page in CardPainter(card, emojis, not_repost, get_decode_pool()).paint_pages(max_height):
+        yield encode_card(page)
+
+
+@dataclass(slots=True)
+class LazyImage:
+    """延迟解码的图片, 测量阶段只读取文件头得到绘制尺寸, 所在页绘制时才解码"""
+
+    size: tuple[int, int]
+    load: Callable[[], PILImage]
+    future: Future[PILImage] | None = None
+
+    def result(self) -> PILImage:
+        """获取解码结果并释放引用, 尚未提交解码时直接解码"""
+        future, self.future = self.future, None
+        return future.result() if future is not None else self.load()
+
+
+@dataclass(slots=True)
+class Block:
+    """测量完成的区块, paint 接收区块顶部的 y 坐标, images 为绘制前需要解码的图片"""
+
+    height: int
+    paint: Callable[[int], None]
+    images: list[LazyImage] = field(default_factory=list)
+
+
+class CardPainter:
+    """卡片绘制器"""
+
+    # 布局常量
+    PADDING = 25
+    AVATAR_TEXT_GAP = 15
+    SECTION_SPACING = 15
+    NAME_TIME_GAP = 5
+    DEFAULT_CARD_WIDTH = 800
+
+    # 图片处理
+    MAX_COVER_HEIGHT = 800
+    MAX_IMAGE_HEIGHT = 800
+    MAX_LONG_IMAGE_HEIGHT = 4000
+    IMAGE_2_GRID_SIZE = 400
+    IMAGE_3_GRID_SIZE = 300
+    IMAGE_GRID_SPACING = 4
+    IMAGE_GRID_COLS = 3
+    MAX_IMAGES_DISPLAY = 9
+
+    # 转发
+    REPOST_PADDING = 12
+    REPOST_SCALE = 0.88
+    REPOST_RADIUS = 8
+
+    # 随缩放比例变化的布局常量
+    SCALED_LAYOUT: ClassVar[tuple[str, ...]] = (
+        "PADDING",
+        "AVATAR_TEXT_GAP",
+        "SECTION_SPACING",
+        "NAME_TIME_GAP",
+        "MAX_COVER_HEIGHT",
+        "MAX_IMAGE_HEIGHT",
+        "MAX_LONG_IMAGE_HEIGHT",
+        "IMAGE_2_GRID_SIZE",
+        "IMAGE_3_GRID_SIZE",
+        "IMAGE_GRID_SPACING",
+        "REPOST_PADDING",
+        "REPOST_RADIUS",
+    )
+
+    # 颜色
+    BG_COLOR: ClassVar[Color] = (255, 255, 255)
+    REPOST_BG_COLOR: ClassVar[Color] = (247, 247, 247)
+    REPOST_BORDER_COLOR: ClassVar[Color] = (230, 230, 230)
+
+    def __init__(
+        self,
+        card: CardData,
+        emojis: EmojiSprites,
+        not_repost: bool = True,
+        pool: Executor | None = None,
+        scale: float = 1.0,
+    ):
+        self.card = card
+        self.emojis = emojis
+        self.not_repost = not_repost
+        self.pool = pool
+        # emoji 的首字符, 不包含这些字符的行直接绘制
+        self._emoji_starts = frozenset(char[0] for char, _ in emojis)
+
+        # 转发内容按缩放比例直接布局, 字体、间距和图片尺寸在绘制前缩放
+        self.scale = scale
+        if scale != 1:
+            for name in self.SCALED_LAYOUT:
+                setattr(self, name, round(getattr(CardPainter, name) * scale))
+        self.fonts = assets.get_fonts(scale)
+        self.avatar_size: int = round(assets.AVATAR_SIZE * scale)
+
+        self.card_width: int = round(self.DEFAULT_CARD_WIDTH * scale)
+        self.content_width: int = self.card_width - 2 * self.PADDING
+
+        self._image: PILImage
+        self._draw: PILImageDraw
+
+        if card.repost:
+            self.repost_painter = CardPainter(card.repost, emojis, False, pool, scale * self.REPOST_SCALE)
+
+    def paint(self) -> PILImage:
+        """绘制卡片
+
+        测量阶段换行文本、只读取图片文件头计算缩放后的尺寸, 得到各区块的精确高度;
+        绘制阶段解码图片并在等高的画布上依次绘制, 无需预估和裁剪
+        """
+        return self._paint_blocks(self._measure())
+
+    def paint_pages(self, max_height: int) -> Iterator[PILImage]:
+        """分页绘制卡片, 每页高度不超过 max_height, 单个区块超出时独占一页
+
+        每页绘制前才解码该页的图片, 绘制完成后立即返回, 已绘制的区块随即释放
+        """
+        blocks = deque(self._measure())
+        if max_height <= 0:
+            yield self._paint_blocks(list(blocks))
+            return
+
+        limit = max_height - self.PADDING * 2
+        page: list[Block] = []
+        page_height = 0
+        while blocks:
+            block = blocks.popleft()
+            if page and page_height + block.height > limit:
+                yield self._paint_blocks(page)
+                page, page_height = [], 0
+            page.append(block)
+            page_height += block.height
+
+        if page:
+            yield self._paint_blocks(page)
+
+    def _paint_blocks(self, blocks: list[Block]) -> PILImage:
+        """在等高的画布上依次绘制区块"""
+        height = self.PADDING * 2 + sum(block.height for block in blocks)
+        bg_color = self.BG_COLOR if self.not_repost else self.REPOST_BG_COLOR
+
+        # 只解码本页的图片, 转发内容中的图片与本卡片的图片一起提交
+        for block in blocks:
+            for image in block.images:
+                if image.future is None:
+                    image.future = self._submit(image.load)
+
+        self._image = Image.new("RGB", (self.card_width, height), bg_color)
+        self._draw = ImageDraw.Draw(self._image)
+
+        y = self.PADDING
+        for block in blocks:
+            block.paint(y)
+            y += block.height
+
+        logger.debug(f"卡片尺寸: {self.card_width}x{height}, 区块数: {len(blocks)}")
+        return self._image
+
+    def _submit(self, fn: Callable[..., T], *args) -> Future[T]:
+        """提交到解码池, 未设置解码池时直接执行"""
+        if self.pool is not None:
+            return self.pool.submit(fn, *args)
+
+        future: Future[T] = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _measure(self) -> list[Block]:
+        """测量各区块"""
+        blocks: list[Block] = []
+
+        # 头部（头像 + 名称 + 时间）
+        if self.card.author is not None:
+            blocks.append(self._measure_header())
+
+        # 标题
+        if self.card.title:
+            blocks.extend(self._measure_text(self.card.title, self.fonts.title, self.SECTION_SPACING))
+
+        # 封面/图片网格/图文内容
+        blocks.extend(self._measure_main_content())
+
+        # 简介
+        if self.card.text:
+            blocks.extend(self._measure_text(self.card.text, self.fonts.body, self.SECTION_SPACING))
+
+        # 额外信息
+        if self.card.extra:
+            blocks.extend(self._measure_text(self.card.extra, self.fonts.muted))
+
+        # 转发内容
+        if self.card.repost:
+            blocks.append(self._measure_repost())
+
+        return blocks
+
+    def _measure_header(self) -> Block:
+        """测量头部（头像 + 名称 + 时间）"""
+        avatar: LazyImage | None = None
+        if self.card.has_avatar:
+            size = (self.avatar_size, self.avatar_size)
+            avatar = LazyImage(size, partial(self._load_avatar, self.card.avatar))
+
+        def paint(y: int) -> None:
+            x_pos = self.PADDING
+
+            # 头像
+            if avatar is not None:
+                img = avatar.result()
+                self._image.paste(img, (x_pos, y), img)
+
+            # 文字区域
+            text_x = self.PADDING + self.avatar_size + self.AVATAR_TEXT_GAP
+            name_height = self.fonts.name.metrics.line_height
+            time_str = self.card.datetime
+            time_height = (self.NAME_TIME_GAP + self.fonts.muted.metrics.line_height) if time_str else 0
+            text_height = name_height + time_height
+
+            # 垂直居中
+            text_y = y + (self.avatar_size - text_height) // 2
+
+            # 名称
+            self._draw.text(
+                (text_x, text_y),
+                self.card.author or "",
+                font=self.fonts.name.metrics.font,
+                fill=self.fonts.name.fill,
+            )
+            text_y += name_height
+
+            # 时间
+            if time_str:
+                text_y += self.NAME_TIME_GAP
+                self._draw.text(
+                    (text_x, text_y),
+                    time_str,
+                    font=self.fonts.muted.metrics.font,
+                    fill=self.fonts.muted.fill,
+                )
+
+            # 平台 Logo
+            if self.not_repost:
+                platform_name = self.card.platform
+                if platform_name in assets.PLATFORM_LOGOS:
+                    logo = assets.PLATFORM_LOGOS[platform_name]
+                    logo_x = self._image.width - self.PADDING - logo.width
+                    logo_y = y + (self.avatar_size - logo.height) // 2
+                    self._image.paste(logo, (logo_x, logo_y), logo)
+
+        return Block(self.avatar_size + self.SECTION_SPACING, paint, [avatar] if avatar else [])
+
+    def _load_avatar(self, avatar_path: Path | None) -> PILImage:
+        """加载头像（带圆形裁剪）"""
+        size = self.avatar_size
+        if avatar_path is None or not avatar_path.exists():
+            return assets.get_default_avatar(size)
+
+        try:
+            return assets.cached_image(avatar_path, (size, size), partial(self._decode_avatar, avatar_path, size))
+        except Exception:
+            return assets.get_default_avatar(size)
+
+    @staticmethod
+    def _decode_avatar(avatar_path: Path, size: int) -> PILImage:
+        avatar = decode_image(avatar_path, size, size, cover=True)
+        avatar = avatar.convert("RGBA").resize((size, size), Image.Resampling.LANCZOS)
+        # 圆形遮罩
+        avatar.putalpha(assets.get_avatar_mask(size))
+        return avatar
+
+    @staticmethod
+    def _probe(path: Path | None) -> tuple[int, int] | None:
+        """只读取文件头获取图片尺寸, 不解码像素, 缺失或无法识别时返回 None"""
+        if path is None or not path.exists():
+            return None
+        try:
+            with Image.open(path) as img:
+                return img.size
+        except Exception:
+            return None
+
+    @staticmethod
+    def _fit_size(
+        src: tuple[int, int],
+        width: int,
+        height: int | None = None,
+        max_height: int | None = None,
+    ) -> tuple[int, int]:
+        """计算等比缩小到目标尺寸以内后的尺寸, 超过 max_height 的超长图只保留顶部 (与 decode_image 一致)"""
+        src_w, src_h = src
+        ratio = width / src_w
+        if height is not None:
+            ratio = min(ratio, height / src_h)
+        scale = min(ratio, 1)
+        size = (max(int(src_w * scale), 1), max(int(src_h * scale), 1))
+        if max_height is not None and src_h * ratio > max_height:
+            size = (size[0], min(size[1], ceil(max_height / ratio * scale)))
+        return size
+
+    def _decode_fitted(self, path: Path, size: tuple[int, int], decode: Callable[[], PILImage]) -> PILImage:
+        """解码图片并缩放到测量时的尺寸, 失败时使用同尺寸的占位图片, 保持已测量的布局"""
+        try:
+            img = decode()
+        except DecodeLimitError as e:
+            logger.warning(e)
+            return self._load_fallback(size)
+        except Exception:
+            logger.opt(exception=True).warning(f"解码图片「{path.name}」失败, 使用占位图片")
+            return self._load_fallback(size)
+
+        if img.size != size:
+            img = img.resize(size, Image.Resampling.LANCZOS)
+        return img
+
+    def _lazy_fallback(self, width: int, height: int | None = None) -> LazyImage:
+        """缩放后的占位图片 (缓存, 不能修改)"""
+        path = resources.random_fallback_pic()
+        with Image.open(path) as img:
+            size = self._fit_size(img.size, width, height)
+        decode = partial(self._decode_fitted, path, size, partial(decode_image, path, width, height))
+        return LazyImage(size, partial(assets.cached_image, path, size, decode))
+
+    def _load_fallback(self, size: tuple[int, int]) -> PILImage:
+        """加载填满指定尺寸的占位图片 (缓存, 不能修改)"""
+        path = resources.random_fallback_pic()
+        return assets.cached_image(path, size, partial(self._fill_image, path, size))
+
+    @staticmethod
+    def _fill_image(path: Path, size: tuple[int, int]) -> PILImage:
+        img = decode_image(path, *size, cover=True)
+        return ImageOps.fit(img, size, Image.Resampling.LANCZOS)
+
+    def _measure_text(self, text: str, styled: StyledFont, spacing: int = 0) -> list[Block]:
+        """测量多行文本, 每行一个区块以便分页, spacing 为最后一行后的间距"""
+        line_height = styled.metrics.line_height
+        blocks = [
+            Block(line_height, partial(self._draw_text, [line], styled))
+            for line in self._wrap_text(text, self.content_width, styled.metrics)
+        ]
+        if blocks:
+            blocks[-1].height += spacing
+        return blocks
+
+    def _measure_main_content(self) -> list[Block]:
+        """测量封面/图片网格/图文内容"""
+        if self.card.is_video:
+            cover = self._lazy_cover()
+            return [
+                Block(
+                    cover.size[1] + self.SECTION_SPACING,
+                    lambda y: self._image.paste(cover.result(), (self.PADDING, y)),
+                    [cover],
+                )
+            ]
+
+        # 图片网格
+        if self.card.grid_total:
+            grid = self._measure_image_grid()
+            return [grid] if grid else []
+
+        # 图文内容
+        blocks: list[Block] = []
+        for item in self.card.graphics:
+            if isinstance(item, str):
+                blocks.extend(self._measure_text(item, self.fonts.body, self.SECTION_SPACING))
+            else:
+                blocks.append(self._measure_img_in_graphics(self._lazy_graphics_image(item.path), item.alt))
+        return blocks
+
+    def _lazy_cover(self) -> LazyImage:
+        """封面缩放到内容宽度, 高度不超过 MAX_COVER_HEIGHT"""
+        path = self.card.cover
+        if (src := self._probe(path)) is None:
+            return self._lazy_fallback(self.content_width, self.MAX_COVER_HEIGHT)
+        assert path is not None
+
+        width = self.content_width
+        height = int(src[1] * width / src[0])
+        if height > self.MAX_COVER_HEIGHT:
+            width = int(width * self.MAX_COVER_HEIGHT / height)
+            height = self.MAX_COVER_HEIGHT
+        return LazyImage((width, height), partial(self._load_cover, path, (width, height)))
+
+    def _load_cover(self, path: Path, size: tuple[int, int]) -> PILImage:
+        """加载并缩放封面"""
+        decode = partial(decode_image, path, self.content_width, self.MAX_COVER_HEIGHT)
+        # 占位图片可能来自缓存, convert 返回副本
+        img = self._decode_fitted(path, size, decode).convert("RGBA")
+
+        # 视频播放按钮
+        btn_size = round(assets.VIDEO_BUTTON_SIZE * self.scale)
+        button = assets.get_video_button(btn_size)
+        btn_x, btn_y = (img.width - btn_size) // 2, (img.height - btn_size) // 2
+        img.paste(button, (btn_x, btn_y), button)
+
+        return img
+
+    def _measure_image_grid(self) -> Block | None:
+        """测量图片网格"""
+        total = self.card.grid_total
+        has_more = total > self.MAX_IMAGES_DISPLAY
+
+        display_paths = self.card.grid[: self.MAX_IMAGES_DISPLAY]
+        images = [img for path in display_paths if (img := self._lazy_grid_item(path, len(display_paths)))]
+        if not images:
+            return None
+
+        count = len(images)
+        cols = 1 if count == 1 else (2 if count in (2, 4) else self.IMAGE_GRID_COLS)
+        rows = [images[start : start + cols] for start in range(0, count, cols)]
+
+        # 计算尺寸
+        if count == 1:
+            img_size = self.content_width
+        else:
+            num_gaps = cols + 1
+            max_size = self.IMAGE_2_GRID_SIZE if cols == 2 else self.IMAGE_3_GRID_SIZE
+            img_size = min((self.content_width - self.IMAGE_GRID_SPACING * num_gaps) // cols, max_size)
+
+        spacing = self.IMAGE_GRID_SPACING
+        row_heights = [max(img.size[1] for img in row_imgs) for row_imgs in rows]
+        height = sum(spacing + max_h for max_h in row_heights) + spacing + self.SECTION_SPACING
+
+        def paint(y: int) -> None:
+            current_y = y
+            for row, (row_imgs, max_h) in enumerate(zip(rows, row_heights)):
+                for i, lazy in enumerate(row_imgs):
+                    img = lazy.result()
+                    img_x = self.PADDING + spacing + i * (img_size + spacing)
+                    img_y = current_y + spacing + (max_h - img.height) // 2
+                    self._image.paste(img, (img_x, img_y))
+
+                    # +N 指示器
+                    if has_more and row == len(rows) - 1 and i == len(row_imgs) - 1:
+                        remaining = total - self.MAX_IMAGES_DISPLAY
+                        self._draw_more_indicator(
+                            self._image,
+                            img_x,
+                            current_y + spacing,
+                            img.width,
+                            img.height,
+                            remaining,
+                        )
+
+                current_y += spacing + max_h
+
+        return Block(height, paint, images)
+
+    def _lazy_grid_item(self, path: Path | None, count: int) -> LazyImage | None:
+        """网格图片, 缺失时使用占位图片, 无法识别时跳过"""
+        fallback = path is None or not path.exists()
+        if fallback:
+            path = resources.random_fallback_pic()
+        if (src := self._probe(path)) is None:
+            return None
+        assert path is not None
+
+        target = self._grid_target(count)
+        if count >= 2:
+            # 多图裁剪为方形
+            side = min(*src, target[0])
+            size = (side, side)
+        else:
+            size = self._fit_size(src, *target)
+
+        decode = partial(self._decode_fitted, path, size, partial(self._decode_grid_image, path, target, count))
+        if fallback:
+            # 占位图片按网格尺寸缓存
+            return LazyImage(size, partial(assets.cached_image, path, size, decode))
+        return LazyImage(size, decode)
+
+    def _grid_target(self, count: int) -> tuple[int, int]:
+        """网格图片的目标尺寸"""
+        if count == 1:
+            return (self.content_width, min(self.MAX_IMAGE_HEIGHT, self.content_width))
+
+        cols = 2 if count in (2, 4) else self.IMAGE_GRID_COLS
+        max_size = self.IMAGE_2_GRID_SIZE if cols == 2 else self.IMAGE_3_GRID_SIZE
+        num_gaps = cols + 1
+        size = min((self.content_width - self.IMAGE_GRID_SPACING * num_gaps) // cols, max_size)
+        return (size, size)
+
+    @staticmethod
+    def _decode_grid_image(path: Path, target: tuple[int, int], count: int) -> PILImage:
+        """解码网格图片, 多图按短边解码并裁剪为方形"""
+        img = decode_image(path, *target, cover=count >= 2)
+        if count >= 2:
+            w, h = img.size
+            if w != h:
+                s = min(w, h)
+                left = (w - s) // 2
+                top = (h - s) // 2
+                img = img.crop((left, top, left + s, top + s))
+        return img
+
+    def _draw_more_indicator(
+        self,
+        image: PILImage,
+        x: int,
+        y: int,
+        w: int,
+        h: int,
+        count: int,
+    ) -> None:
+        """绘制 +N 指示器"""
+        overlay = Image.new("RGBA", (w, h), (0, 0, 0, 100))
+        image.paste(overlay, (x, y), overlay)
+
+        indicator_text = f"+{count}"
+        font_size, color = round(assets.INDICATOR_FONT_SIZE * self.scale), (255, 255, 255)
+        font = assets.get_indicator_font(font_size)
+        text_w = font.getbbox(indicator_text)[2]
+        text_x = x + (w - text_w) // 2
+        text_y = y + (h - font_size) // 2
+        ImageDraw.Draw(image).text((text_x, text_y), indicator_text, fill=color, font=font)
+
+    def _lazy_graphics_image(self, path: Path | None) -> LazyImage:
+        """图文中的图片, 缺失时使用占位图片"""
+        if (src := self._probe(path)) is None:
+            return self._lazy_fallback(self.content_width)
+        assert path is not None
+
+        width, max_height = self.content_width, self.MAX_LONG_IMAGE_HEIGHT
+        size = self._fit_size(src, width, max_height=max_height)
+        decode = partial(decode_image, path, width, max_height=max_height)
+        return LazyImage(size, partial(self._decode_fitted, path, size, decode))
+
+    def _measure_img_in_graphics(self, lazy: LazyImage, alt: str | None) -> Block:
+        """测量图文中的图片"""
+        muted = self.fonts.muted
+        width, img_height = lazy.size
+        height = img_height + self.SECTION_SPACING
+        if alt:
+            height += self.SECTION_SPACING + muted.metrics.line_height
+
+        def paint(y: int) -> None:
+            x_pos = self.PADDING + (self.content_width - width) // 2
+            self._image.paste(lazy.result(), (x_pos, y))
+
+            # Alt 文本
+            if alt:
+                text_w = muted.metrics.get_text_width(alt)
+                text_x = self.PADDING + (self.content_width - text_w) // 2
+                self._draw.text(
+                    (text_x, y + img_height + self.SECTION_SPACING),
+                    alt,
+                    font=muted.metrics.font,
+                    fill=muted.fill,
+                )
+
+        return Block(height, paint, [lazy])
+
+    def _measure_repost(self) -> Block:
+        """测量转发内容"""
+        # 转发内容已按缩放比例布局, 无需再缩放; 其中的图片随所在页一起解码
+        painter = self.repost_painter
+        repost_blocks = painter._measure()
+        repost_height = painter.PADDING * 2 + sum(block.height for block in repost_blocks)
+        container_h = repost_height + self.REPOST_PADDING * 2
+
+        def paint(y: int) -> None:
+            repost_img = painter._paint_blocks(repost_blocks)
+
+            # 容器
+            x1, y1 = self.PADDING, y
+            x2, y2 = self.PADDING + self.content_width, y + container_h
+
+            # 背景和边框
+            self._draw.rounded_rectangle(
+                (x1, y1, x2, y2),
+                radius=self.REPOST_RADIUS,
+                fill=self.REPOST_BG_COLOR,
+                outline=self.REPOST_BORDER_COLOR,
+            )
+
+            # 居中贴图
+            card_x = x1 + (self.content_width - repost_img.width) // 2
+            card_y = y1 + self.REPOST_PADDING
+            self._image.paste(repost_img, (card_x, card_y))
+
+        images = [image for block in repost_blocks for image in block.images]
+        return Block(container_h + self.SECTION_SPACING, paint, images)
+
+    def _draw_text(self, lines: list[str], styled: StyledFont, y: int) -> None:
+        """绘制多行文本, emoji 使用预渲染的图像"""
+        metrics = styled.metrics
+        font = metrics.font
+        for line in lines:
+            x = self.PADDING
+            if self._emoji_starts.isdisjoint(line):
+                self._draw.text((x, y), line, font=font, fill=styled.fill)
+                y += metrics.line_height
+                continue
+
+            for run, is_emoji in self._split_emoji(line):
+                if is_emoji:
+                    if sprite := self.emojis.get((run, font.size)):
+                        self._image.paste(sprite, (x, y), sprite)
+                    x += font.size
+                else:
+                    self._draw.text((x, y), run, font=font, fill=styled.fill)
+                    x += int(font.getlength(run))
+            y += metrics.line_height
+
+    @staticmethod
+    def _split_emoji(line: str) -> Iterator[tuple[str, bool]]:
+        """按 emoji 切分单行文本, 返回 (片段, 是否为 emoji)"""
+        start = 0
+        for ed in emoji.emoji_list(line):
+            if ed["match_start"] > start:
+                yield line[start : ed["match_start"]], False
+            yield ed["emoji"], True
+            start = ed["match_end"]
+        if start < len(line):
+            yield line[start:], False
+
+    def _wrap_text(self, text: str, max_width: int, metrics: FontMetrics) -> list[str]:
+        """文本自动换行
+
+        每个段落只查找一次 emoji, 切分为字符/emoji 片段并累加前缀宽度,
+        每行通过二分查找确定可容纳的片段数, 行尾标点允许超出宽度
+        """
+        if not text:
+            return []
+
+        # 去掉 制表符
+        text = text.replace("\t", " ")
+        # 去掉 变体选择符
+        text = text.replace(chr(65039), "")
+
+        lines: list[str] = []
+        for paragraph in text.splitlines():
+            if not paragraph:
+                lines.append("")
+                continue
+
+            tokens, prefix = self._measure_tokens(paragraph, metrics)
+            count = len(tokens)
+            start = 0
+            while start < count:
+                # 首个片段总是放入当前行, 之后尽量放入不超过宽度的片段
+                end = max(bisect_right(prefix, prefix[start] + max_width, start + 1) - 1, start + 1)
+                # 超出宽度的行尾标点仍然留在当前行
+                while end < count and self._is_trailing_token(tokens[end]):
+                    end += 1
+                lines.append("".join(tokens[start:end]))
+                start = end
+
+        return lines
+
+    @staticmethod
+    def _measure_tokens(paragraph: str, metrics: FontMetrics) -> tuple[list[str], list[int]]:
+        """将段落切分为字符/emoji 片段, 返回片段列表和前缀宽度 (长度为片段数 + 1)"""
+        tokens: list[str] = []
+        prefix = [0]
+        width = 0
+        emoji_width = metrics.font.size
+        char_width = metrics.get_char_width_fast
+
+        idx = 0
+        for ed in emoji.emoji_list(paragraph):
+            for char in paragraph[idx : ed["match_start"]]:
+                tokens.append(char)
+                width += char_width(char)
+                prefix.append(width)
+            tokens.append(ed["emoji"])
+            width += emoji_width
+            prefix.append(width)
+            idx = ed["match_end"]
+        for char in paragraph[idx:]:
+            tokens.append(char)
+            width += char_width(char)
+            prefix.append(width)
+
+        return tokens, prefix
+
+    @classmethod
+    def _is_trailing_token(cls, token: str) -> bool:
+        return len(token) == 1 and cls.is_trailing_punctuation(token)
+
+    @staticmethod
+    def is_trailing_punctuation(c: str) -> bool:
+        """判断是否可作为行尾的标点符号"""
+        return c in "，。！？；：、）】》〉」』〕〗〙〛…—·,.;:!?)]}"
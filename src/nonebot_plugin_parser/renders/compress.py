@@ -0,0 +1,89 @@
+"""发送前图片压缩 - 将原图缩小到最大边长并按字节预算重新编码, 缩短上传时间"""
+
+import asyncio
+import hashlib
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image, ImageOps
+from nonebot import logger
+
+from .pool import run_in_pool, get_executor
+from ..utils import atomic_write
+from ..config import pconfig
+
+SEND_QUALITIES = (90, 80, 70, 60, 50)
+"""依次尝试的 JPEG 质量, 取第一个不超过预算的"""
+
+
+def compress_image(path: Path, max_side: int, max_size: int) -> Path:
+    """压缩图片并缓存到缓存目录, 无需压缩或压缩无收益时返回原图
+
+    动图和带透明通道的图片保持原样
+
+    Args:
+        path: 图片路径
+        max_side: 最大边长, 0 为不限制
+        max_size: 字节预算, 0 为不限制
+    """
+    # 不同来源的同名文件 (如不同帖子的 0.jpg) 不能共用缓存
+    stat = path.stat()
+    source = hashlib.md5(f"{path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:16]
+    target = pconfig.cache_dir / f"{path.stem}.{source}.send{max_side}x{max_size}.jpg"
+    if target.exists():
+        return target
+
+    src_size = stat.st_size
+    with Image.open(path) as img:
+        if getattr(img, "is_animated", False) or img.has_transparency_data:
+            return path
+        width, height = img.size
+    oversized = max_side > 0 and max(width, height) > max_side
+    if not oversized and (max_size <= 0 or src_size <= max_size):
+        return path
+
+    if oversized:
+        # common 渲染器依赖 base 模块, 在此导入避免循环导入
+        from .common.decode import decode_image
+
+        img = decode_image(path, max_side, max_side)
+    else:
+        with Image.open(path) as src:
+            img = src.copy()
+    # 按 EXIF 方向旋转后再缩放, 重新编码的 JPEG 不保留方向标记
+    img = ImageOps.exif_transpose(img)
+    if oversized:
+        img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    img = img.convert("RGB")
+
+    data = b""
+    for quality in SEND_QUALITIES:
+        output = BytesIO()
+        img.save(output, format="JPEG", quality=quality, optimize=True)
+        data = output.getvalue()
+        if max_size <= 0 or len(data) <= max_size:
+            break
+
+    if len(data) >= src_size:
+        return path
+
+    # 预览和缩略图可能同时压缩同一张封面
+    atomic_write(target, lambda f: f.write(data))
+    return target
+
+
+async def compress_for_send(path: Path) -> Path:
+    """按 `parser_send_image_max_side` 和 `parser_send_image_max_size` 压缩待发送的图片, 未配置时返回原图"""
+    max_side = pconfig.send_image_max_side
+    max_size = pconfig.send_image_max_size * 1024
+    if max_side <= 0 and max_size <= 0:
+        return path
+
+    try:
+        if get_executor() is None:
+            # 渲染池未启用时在线程中压缩, 避免阻塞事件循环
+            return await asyncio.to_thread(compress_image, path, max_side, max_size)
+        return await run_in_pool(compress_image, path, max_side, max_size)
+    except Exception:
+        logger.opt(exception=True).warning(f"压缩图片「{path.name}」失败, 发送原图")
+        return path
@@ -4,6 +4,7 @@ from typing_extensions import override
 
 from .base import UniHelper, UniMessage, BaseRenderer
 from ..helper import Text, Segment
+from .compress import compress_for_send
 
 
 class DefaultRenderer(BaseRenderer):
@@ -26,7 +27,7 @@ class DefaultRenderer(BaseRenderer):
         segs: list[Segment] = [Text(text) for text in texts]
 
         if self.result.video and (cover := self.result.video.cover) and (cover_path := await cover.safe_get()):
-            segs.insert(1, UniHelper.img_seg(cover_path))
+            segs.insert(1, UniHelper.img_seg(await compress_for_send(cover_path)))
 
         if total_len > 300:
             yield UniMessage(UniHelper.construct_forward_message(segs))
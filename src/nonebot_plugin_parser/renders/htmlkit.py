@@ -0,0 +1,77 @@
+from functools import cache
+from typing_extensions import override
+
+import jinja2
+from PIL import ImageFont
+from nonebot import require
+
+require("nonebot_plugin_htmlkit")
+from nonebot_plugin_htmlkit import html_to_pic
+
+from . import resources
+from .base import ImageRenderer, pconfig
+from .variants import prepare_variants
+
+TEMPLATE_NAME = "card.htmlkit.jinja2"
+CARD_WIDTH = 800
+
+# 平台主题 (主色, 背景色), 与 card.html.jinja2 一致
+PLATFORM_THEMES: dict[str, tuple[str, str]] = {
+    "bilibili": ("#00a1d6", "#c8ebf5"),
+    "weibo": ("#e6162d", "#f0b0b0"),
+    "xiaohongshu": ("#ff2442", "#f8ccda"),
+    "douyin": ("#161823", "#a8d8d6"),
+    "youtube": ("#ff0000", "#f8d0d0"),
+    "twitter": ("#000000", "#d8d8d8"),
+    "kuaishou": ("#ff4906", "#f8dac8"),
+    "acfun": ("#fd4c5d", "#f8d0d5"),
+    "tiktok": ("#010101", "#a8d8d6"),
+    "nga": ("#816b45", "#ebe3d4"),
+}
+DEFAULT_THEME = ("#6366f1", "#dddefa")
+
+_template_env = jinja2.Environment(
+    loader=jinja2.FileSystemLoader(ImageRenderer.templates_dir),
+    enable_async=True,
+)
+CARD_TEMPLATE = _template_env.get_template(TEMPLATE_NAME)
+"""预编译的 htmlkit 卡片模板"""
+
+
+@cache
+def _font_family() -> str:
+    """字体族名, htmlkit 通过 fontconfig 查找字体, 字体需已安装到系统或 fontconfig 目录"""
+    font = pconfig.custom_font or resources.DEFAULT_FONT_PATH
+    try:
+        return ImageFont.truetype(font, 12).getname()[0] or "sans-serif"
+    except OSError:
+        return "sans-serif"
+
+
+class HtmlKitRenderer(ImageRenderer):
+    """htmlkit 渲染器, 使用 litehtml 排版, 无需浏览器"""
+
+    @override
+    async def render_image(self) -> bytes:
+        logo = resources.RESOURCES_DIR / f"{self.result.platform.name}.png"
+        logo = logo.as_uri() if logo.exists() else None
+        primary, background = PLATFORM_THEMES.get(self.result.platform.name, DEFAULT_THEME)
+
+        html = await CARD_TEMPLATE.render_async(
+            logo=logo,
+            images=await prepare_variants(self.result),
+            theme={"primary": primary, "background": background},
+            result=self.result,
+            font_family=_font_family(),
+            font_weight=pconfig.custom_font_weight,
+            fallback_pic=resources.random_fallback_pic().as_uri(),
+            default_avatar=resources.DEFAULT_AVATAR_PATH.as_uri(),
+        )
+
+        return await html_to_pic(
+            html,
+            base_url=self.templates_dir.as_uri() + "/",
+            max_width=CARD_WIDTH,
+            font_name=_font_family(),
+            allow_refit=False,
+        )
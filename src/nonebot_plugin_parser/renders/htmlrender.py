@@ -1,12 +1,119 @@
+import asyncio
+from contextlib import suppress, asynccontextmanager
+from collections import deque
+from collections.abc import AsyncIterator
 from typing_extensions import override
 
-from nonebot import require
+import jinja2
+from nonebot import logger, require, get_driver
 
 require("nonebot_plugin_htmlrender")
-from nonebot_plugin_htmlrender import template_to_pic
+from playwright.async_api import Page
+from nonebot_plugin_htmlrender.browser import get_browser
 
 from . import resources
 from .base import ImageRenderer, pconfig
+from .variants import prepare_variants
+
+TEMPLATE_NAME = "card.html.jinja2"
+VIEWPORT = {"width": 800, "height": 100}
+DEVICE_SCALE_FACTOR = 2
+SCREENSHOT_TIMEOUT = 30_000
+
+_template_env = jinja2.Environment(
+    loader=jinja2.FileSystemLoader(ImageRenderer.templates_dir),
+    enable_async=True,
+)
+CARD_TEMPLATE = _template_env.get_template(TEMPLATE_NAME)
+"""预编译的卡片模板"""
+
+
+def _font_uri() -> str | None:
+    font = pconfig.custom_font or resources.DEFAULT_FONT_PATH
+    return font.as_uri() if font.exists() else None
+
+
+class PagePool:
+    """预热的浏览器页面池
+
+    页面创建后加载一次字体并常驻, 每次渲染只替换页面内容,
+    渲染次数达到上限的页面会被关闭重建, 避免浏览器内存持续增长
+    """
+
+    def __init__(self, size: int, max_uses: int):
+        self.size = max(size, 1)
+        self.max_uses = max(max_uses, 1)
+        self._idle: deque[tuple[Page, int]] = deque()
+        self._slots = asyncio.Semaphore(self.size)
+
+    async def _new_page(self) -> Page:
+        browser = await get_browser()
+        page = await browser.new_page(device_scale_factor=DEVICE_SCALE_FACTOR, viewport=VIEWPORT)
+        page.on("console", lambda msg: logger.debug(f"浏览器控制台: {msg.text}"))
+        # 以模板目录为基址, 页面内容中的 file:// 资源才能被加载
+        await page.goto(ImageRenderer.templates_dir.as_uri())
+        if font := _font_uri():
+            await page.set_content(
+                f"<style>@font-face {{ font-family: 'CustomFont'; src: url('{font}'); }}</style>"
+                "<span style=\"font-family: 'CustomFont'\">预热</span>",
+                wait_until="networkidle",
+            )
+            await page.evaluate("document.fonts.ready.then(() => null)")
+        return page
+
+    def _pop_idle(self) -> tuple[Page, int] | None:
+        while self._idle:
+            page, uses = self._idle.popleft()
+            if not page.is_closed():
+                return page, uses
+        return None
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """借出一个页面, 出错时页面直接关闭不再复用"""
+        async with self._slots:
+            page, uses = self._pop_idle() or (await self._new_page(), 0)
+            try:
+                yield page
+            except BaseException:
+                with suppress(Exception):
+                    await page.close()
+                raise
+
+            if uses + 1 >= self.max_uses:
+                logger.debug(f"浏览器页面已渲染 {uses + 1} 次, 关闭重建")
+                await page.close()
+            else:
+                self._idle.append((page, uses + 1))
+
+    async def warmup(self) -> None:
+        """预先创建页面直到填满页面池"""
+        while len(self._idle) < self.size:
+            self._idle.append((await self._new_page(), 0))
+        logger.success(f"预热 htmlrender 页面 {self.size} 个")
+
+    async def close(self) -> None:
+        while self._idle:
+            page, _ = self._idle.popleft()
+            with suppress(Exception):
+                await page.close()
+
+
+PAGE_POOL = PagePool(pconfig.html_page_pool_size, pconfig.html_page_max_uses)
+
+
+@get_driver().on_startup
+async def warmup_page_pool():
+    try:
+        await PAGE_POOL.warmup()
+    except Exception:
+        logger.opt(exception=True).warning("预热 htmlrender 页面失败, 将在首次渲染时创建")
+
+
+@get_driver().on_shutdown
+async def close_page_pool():
+    logger.debug("正在关闭 htmlrender 页面池...")
+    await PAGE_POOL.close()
 
 
 class HtmlRenderer(ImageRenderer):
@@ -19,20 +126,17 @@ class HtmlRenderer(ImageRenderer):
         logo = resources.RESOURCES_DIR / f"{self.result.platform.name}.png"
         logo = logo.as_uri() if logo.exists() else None
 
-        font = pconfig.custom_font or resources.DEFAULT_FONT_PATH
-        font = font.as_uri() if font.exists() else None
-
-        return await template_to_pic(
-            template_path=str(self.templates_dir),
-            template_name="card.html.jinja2",
-            templates={
-                "logo": logo,
-                "font": font,
-                "result": self.result,
-                "font_weight": pconfig.custom_font_weight,
-                "fallback_pic": resources.random_fallback_pic().as_uri(),
-                "play_button": resources.DEFAULT_VIDEO_BUTTON_PATH.as_uri(),
-                "default_avatar": resources.DEFAULT_AVATAR_PATH.as_uri(),
-            },
-            pages={"viewport": {"width": 800, "height": 100}},
+        html = await CARD_TEMPLATE.render_async(
+            logo=logo,
+            images=await prepare_variants(self.result, DEVICE_SCALE_FACTOR),
+            font=_font_uri(),
+            result=self.result,
+            font_weight=pconfig.custom_font_weight,
+            fallback_pic=resources.random_fallback_pic().as_uri(),
+            play_button=resources.DEFAULT_VIDEO_BUTTON_PATH.as_uri(),
+            default_avatar=resources.DEFAULT_AVATAR_PATH.as_uri(),
         )
+
+        async with PAGE_POOL.page() as page:
+            await page.set_content(html, wait_until="networkidle")
+            return await page.screenshot(full_page=True, type="png", timeout=SCREENSHOT_TIMEOUT)
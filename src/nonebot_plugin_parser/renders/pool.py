@@ -0,0 +1,107 @@
+"""渲染池 - 在线程池/进程池中执行 CPU 密集的绘制任务, 避免阻塞事件循环"""
+
+import asyncio
+import multiprocessing
+from typing import TypeVar, ParamSpec
+from functools import partial
+from contextlib import suppress
+from collections.abc import Callable, Generator, AsyncGenerator
+from concurrent.futures import Executor, BrokenExecutor, ThreadPoolExecutor, ProcessPoolExecutor
+
+from nonebot import logger, get_driver
+
+from ..config import pconfig
+from ..constants import RenderPoolType
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+_executor: Executor | None = None
+_initialized = False
+
+
+def _create_executor() -> Executor | None:
+    pool_type = pconfig.render_pool
+    max_workers = max(pconfig.render_pool_size, 1)
+
+    if pool_type == RenderPoolType.process:
+        # 渲染进程需要继承已加载的插件和资源, 仅支持 fork
+        if "fork" in multiprocessing.get_all_start_methods():
+            logger.info(f"使用进程池渲染, 进程数: {max_workers}")
+            return ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context("fork"))
+        logger.warning("当前平台不支持 fork, 渲染进程池已回退到线程池")
+        pool_type = RenderPoolType.thread
+
+    if pool_type == RenderPoolType.thread:
+        logger.info(f"使用线程池渲染, 线程数: {max_workers}")
+        return ThreadPoolExecutor(max_workers, thread_name_prefix="parser-render")
+
+    return None
+
+
+def get_executor() -> Executor | None:
+    """获取渲染池, 未启用时返回 None"""
+    global _executor, _initialized
+
+    if not _initialized:
+        _executor = _create_executor()
+        _initialized = True
+    return _executor
+
+
+async def run_in_pool(func: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+    """在渲染池中执行函数, 渲染池不可用时回退到当前进程执行"""
+    global _executor
+
+    if executor := get_executor():
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
+        except BrokenExecutor:
+            logger.opt(exception=True).warning("渲染池异常, 已回退到当前进程渲染")
+            executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+    return func(*args, **kwargs)
+
+
+def _collect(func: Callable[P, Generator[T, None, None]], *args: P.args, **kwargs: P.kwargs) -> list[T]:
+    return list(func(*args, **kwargs))
+
+
+async def iter_in_pool(
+    func: Callable[P, Generator[T, None, None]],
+    *args: P.args,
+    **kwargs: P.kwargs,
+) -> AsyncGenerator[T, None]:
+    """在渲染池中逐项执行生成器, 每得到一项立即返回
+
+    生成器无法跨进程传递, 使用进程池时在子进程中执行完整个生成器后再依次返回
+    """
+    if isinstance(get_executor(), ProcessPoolExecutor):
+        for item in await run_in_pool(_collect, func, *args, **kwargs):
+            yield item
+        return
+
+    iterator = func(*args, **kwargs)
+    step: asyncio.Future[T | None] | None = None
+    try:
+        while True:
+            # 取消时不中断池中正在执行的一步, 见 finally
+            step = asyncio.ensure_future(run_in_pool(next, iterator, None))
+            if (item := await asyncio.shield(step)) is None:
+                break
+            yield item
+    finally:
+        # 等待正在执行的一步结束后再关闭, 否则 close() 会抛出 "generator already executing"
+        if step is not None and not step.done():
+            with suppress(Exception):
+                await step
+        await run_in_pool(iterator.close)
+
+
+@get_driver().on_shutdown
+async def shutdown_render_pool():
+    if _executor is not None:
+        logger.debug("正在关闭渲染池...")
+        _executor.shutdown(wait=False, cancel_futures=True)
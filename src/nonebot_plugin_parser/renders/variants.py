@@ -0,0 +1,118 @@
+"""HTML 卡片图片预处理 - 按模板中的显示尺寸生成缩小后的图片, 浏览器无需解码原图"""
+
+import asyncio
+from pathlib import Path
+from collections.abc import Iterator
+
+from PIL import Image, ImageOps
+from nonebot import logger
+
+from .pool import run_in_pool
+from ..utils import atomic_write
+from ..config import pconfig
+from ..parsers import ParseResult, ImageContent
+from ..parsers.task import PathTask
+from .common.decode import decode_image
+
+CONTENT_WIDTH = 704
+"""卡片内容区宽度 (CSS 像素), 800 - body 与 card 的左右内边距"""
+GRID_GAP = 8
+AVATAR_SIZE = 64
+VARIANT_QUALITY = 85
+
+# (宽, 高), 高为 None 时按宽度等比缩放, 否则按 object-fit: cover 居中裁剪
+Box = tuple[int, int | None]
+
+
+def grid_box(cols: int) -> Box:
+    size = (CONTENT_WIDTH - GRID_GAP * (cols - 1)) // cols
+    return size, size
+
+
+def _iter_boxes(result: ParseResult) -> Iterator[tuple[PathTask, Box]]:
+    """与 card.html.jinja2 的布局一一对应"""
+    if result.author and result.author.avatar:
+        yield result.author.avatar, (AVATAR_SIZE, AVATAR_SIZE)
+
+    if (video := result.video) is not None:
+        if video.cover is not None:
+            yield video.cover, (CONTENT_WIDTH, None)
+    elif images := result.all_grid_images:
+        if len(images) == 1:
+            yield images[0], (CONTENT_WIDTH, None)
+        else:
+            box = grid_box(2 if len(images) in (2, 4) else 3)
+            yield from ((image, box) for image in images[:9])
+    else:
+        for graphics in result.graphics:
+            if isinstance(graphics, ImageContent):
+                yield graphics.path_task, (CONTENT_WIDTH, None)
+
+    if result.repost is not None:
+        yield from _iter_boxes(result.repost)
+
+
+def make_variant(path: Path, width: int, height: int | None = None) -> Path:
+    """生成不超过 width x height 的图片并缓存到缓存目录, 原图更小且无需裁剪时直接返回原图
+
+    不透明图片编码为 JPEG, 带透明通道的编码为 WebP
+    """
+    stem = f"{path.stem}.{width}x{height or 0}"
+    for suffix in (".jpg", ".webp"):
+        if (cached := pconfig.cache_dir / f"{stem}{suffix}").exists():
+            return cached
+
+    with Image.open(path) as img:
+        src_w, src_h = img.size
+    scale = max(width / src_w, height / src_h) if height is not None else width / src_w
+    if scale >= 1:
+        if height is None or src_w * height == src_h * width:
+            return path
+        # 原图更小但比例不同时只裁剪不放大, 不支持 object-fit 的渲染器也能得到正确比例
+        width, height = round(width / scale), round(height / scale)
+
+    img = decode_image(path, width, height, cover=height is not None)
+    if height is None:
+        img = img.resize((width, max(round(src_h * scale), 1)), Image.Resampling.LANCZOS)
+    else:
+        img = ImageOps.fit(img, (width, height), Image.Resampling.LANCZOS)
+
+    if img.has_transparency_data:
+        target = pconfig.cache_dir / f"{stem}.webp"
+        img, fmt = img.convert("RGBA"), "WEBP"
+    else:
+        target = pconfig.cache_dir / f"{stem}.jpg"
+        img, fmt = img.convert("RGB"), "JPEG"
+
+    # 并发渲染同一张图片时避免读到不完整的文件或互相覆盖
+    atomic_write(target, lambda f: img.save(f, format=fmt, quality=VARIANT_QUALITY))
+    return target
+
+
+async def _variant_uri(task: PathTask, box: Box, scale: float) -> str | None:
+    if (path := await task.safe_get()) is None:
+        return None
+
+    width, height = box
+    width = round(width * scale)
+    height = round(height * scale) if height is not None else None
+    try:
+        path = await run_in_pool(make_variant, path, width, height)
+    except Exception:
+        logger.opt(exception=True).warning(f"生成图片「{path.name}」的缩略图失败, 使用原图")
+    return path.as_uri()
+
+
+async def prepare_variants(result: ParseResult, scale: float = 1.0) -> dict[PathTask, str]:
+    """并发下载并生成卡片中所有图片的显示尺寸版本
+
+    Args:
+        result: 解析结果
+        scale: 设备缩放比例, 生成的图片尺寸为 CSS 尺寸乘以该值
+
+    Returns:
+        PathTask 到图片 URI 的映射, 下载失败的图片不在其中
+    """
+    pairs = list(_iter_boxes(result))
+    uris = await asyncio.gather(*(_variant_uri(task, box, scale) for task, box in pairs))
+    return {task: uri for (task, _), uri in zip(pairs, uris) if uri is not None}
@@ -0,0 +1,140 @@
+"""上传缓存 - 记录媒体在聊天平台上的资源 ID, 同一文件再次发送时直接引用, 无需重新上传"""
+
+import asyncio
+import hashlib
+from typing import Any, TypeVar
+from pathlib import Path
+from collections.abc import Callable, Iterable, Iterator, Awaitable
+
+from nonebot import logger
+from nonebot_plugin_alconna import SupportAdapter
+from nonebot_plugin_alconna.uniseg import Video, UniMessage
+from nonebot_plugin_alconna.uniseg.segment import Media
+
+from .utils import LimitedSizeDict
+from .outgoing import iter_media
+
+R = TypeVar("R")
+IdExtractor = Callable[[Any], list[tuple[str, str]]]
+"""从发送回执中按顺序提取 (媒体类型, 资源 ID), 包括引用资源 ID 发送的媒体
+
+媒体类型为消息段类名的小写: image / video / voice / audio / file
+"""
+ResourceKey = tuple[str, str]
+"""(适配器名称, 文件内容哈希)"""
+
+_extractors: dict[str, IdExtractor] = {}
+_resource_ids: LimitedSizeDict[ResourceKey, str] = LimitedSizeDict(max_size=512)
+# 键为 (路径, 修改时间, 大小)
+_digests: LimitedSizeDict[tuple[Path, int, int], str] = LimitedSizeDict(max_size=512)
+
+
+def register_extractor(adapter: str) -> Callable[[IdExtractor], IdExtractor]:
+    """注册适配器的资源 ID 提取函数, 只有注册过的适配器才会缓存上传结果"""
+
+    def decorator(func: IdExtractor) -> IdExtractor:
+        _extractors[adapter] = func
+        return func
+
+    return decorator
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def file_digest(path: Path) -> str:
+    """文件内容哈希, 按路径、修改时间和大小缓存"""
+    stat = path.stat()
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    if (digest := _digests.get(key)) is None:
+        digest = _digests[key] = await asyncio.to_thread(_sha256, path)
+    return digest
+
+
+def _match_ids(
+    medias: Iterable[tuple[Media, ResourceKey]],
+    ids: list[tuple[str, str]],
+) -> Iterator[tuple[ResourceKey, str]]:
+    """按顺序将回执中的资源 ID 对应到类型相同的媒体, 某个媒体没有对应的 ID 时之后的媒体都不再对应"""
+    remaining = iter(ids)
+    for seg, key in medias:
+        kind = type(seg).__name__.lower()
+        for id_kind, resource_id in remaining:
+            if id_kind == kind:
+                yield key, resource_id
+                break
+
+
+async def send(message: UniMessage, adapter: str, send_func: Callable[[UniMessage], Awaitable[R]]) -> R:
+    """发送消息, 已上传过的媒体替换为资源 ID, 引用失败时重新上传
+
+    Args:
+        message: 待发送的消息
+        adapter: 当前 bot 的适配器名称
+        send_func: 实际发送消息的函数, 返回值作为回执交给资源 ID 提取函数
+    """
+    if (extractor := _extractors.get(adapter)) is None:
+        return await send_func(message)
+
+    # 缩略图随视频发送, 回执中没有单独的资源 ID
+    medias = list(iter_media(message))
+    thumbnails = {id(seg.thumbnail) for seg in medias if isinstance(seg, Video) and seg.thumbnail is not None}
+    medias = [seg for seg in medias if id(seg) not in thumbnails]
+    paths = [Path(seg.path) for seg in medias if seg.path is not None]
+    keys = [(adapter, digest) for digest in await asyncio.gather(*(file_digest(path) for path in paths))]
+
+    hits = [(seg, key, path) for seg, key, path in zip(medias, keys, paths) if key in _resource_ids]
+    for seg, key, _ in hits:
+        seg.id, seg.path = _resource_ids[key], None
+
+    try:
+        receipt = await send_func(message)
+    except Exception:
+        if not hits:
+            raise
+        logger.opt(exception=True).warning(f"引用已上传的 {len(hits)} 个媒体失败, 重新上传")
+        for seg, key, path in hits:
+            seg.id, seg.path = None, path
+            _resource_ids.pop(key, None)
+        receipt = await send_func(message)
+
+    if medias:
+        try:
+            ids = extractor(receipt)
+        except Exception:
+            logger.opt(exception=True).debug("提取资源 ID 失败")
+            ids = []
+        _resource_ids.update(_match_ids(zip(medias, keys), ids))
+    return receipt
+
+
+TELEGRAM_MEDIA_KINDS = {
+    "photo": "image",
+    "sticker": "image",
+    "animation": "video",
+    "video": "video",
+    "voice": "voice",
+    "audio": "audio",
+    "document": "file",
+}
+"""Telegram 消息中的媒体字段及其对应的媒体类型, GIF 同时带有 animation 和 document, 按顺序取第一个"""
+
+
+@register_extractor(SupportAdapter.telegram)
+def _telegram_file_ids(receipt: Any) -> list[tuple[str, str]]:
+    """Telegram 发送后返回的消息中包含 file_id, 每条消息一个媒体, 图片取最大尺寸"""
+    ids: list[tuple[str, str]] = []
+    for message in getattr(receipt, "msg_ids", ()):
+        for attr, kind in TELEGRAM_MEDIA_KINDS.items():
+            media = getattr(message, attr, None)
+            if isinstance(media, list):
+                media = media[-1] if media else None
+            if file_id := getattr(media, "file_id", None):
+                ids.append((kind, file_id))
+                break
+    return ids
@@ -1,11 +1,17 @@
+import os
 import re
+import uuid
 import asyncio
 import hashlib
-from typing import Any, TypeVar
+from typing import IO, Any, TypeVar
 from pathlib import Path
+from tempfile import NamedTemporaryFile
 from collections import OrderedDict
 from urllib.parse import urlparse
+from collections.abc import Callable, Awaitable
 
+import aiofiles
+import aiofiles.os
 from anyio import Path as AnyioPath
 from nonebot import logger
 
@@ -34,21 +40,51 @@ async def safe_unlink(path: Path):
     await AnyioPath(path).unlink(missing_ok=True)
 
 
-async def exec_ffmpeg_cmd(cmd: list[str]) -> None:
-    """执行 ffmpeg 命令"""
+def atomic_write(path: Path, writer: Callable[[IO[bytes]], Any]) -> None:
+    """原子写入文件
+
+    先由 writer 写入同目录下唯一的临时文件再替换目标文件,
+    并发写入同一路径时不会互相覆盖, 读取方也不会读到不完整的文件
+    """
+    temp = NamedTemporaryFile(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp", delete=False)
+    try:
+        with temp:
+            writer(temp)
+        os.replace(temp.name, path)
+    except BaseException:
+        Path(temp.name).unlink(missing_ok=True)
+        raise
+
+
+async def async_atomic_write(path: Path, writer: Callable[[Any], Awaitable[Any]]) -> None:
+    """原子写入文件, writer 接收 aiofiles 打开的临时文件, 其余同 `atomic_write`"""
+    temp = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        async with aiofiles.open(temp, "wb") as f:
+            await writer(f)
+        await aiofiles.os.replace(temp, path)
+    except BaseException:
+        await safe_unlink(temp)
+        raise
+
+
+async def exec_ffmpeg_cmd(cmd: list[str]) -> bytes:
+    """执行 ffmpeg/ffprobe 命令, 返回标准输出"""
     logger.debug(f"Executing ffmpeg command: {' '.join(cmd)}")
     try:
         process = await asyncio.create_subprocess_exec(
             *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
         )
-        _, stderr = await process.communicate()
+        stdout, stderr = await process.communicate()
         return_code = process.returncode
     except FileNotFoundError:
-        raise RuntimeError("ffmpeg 未安装或无法找到可执行文件")
+        raise RuntimeError(f"{cmd[0]} 未安装或无法找到可执行文件")
 
     if return_code != 0:
         error_msg = stderr.decode().strip()
-        raise RuntimeError(f"ffmpeg 执行失败: {error_msg}")
+        raise RuntimeError(f"{cmd[0]} 执行失败: {error_msg}")
+
+    return stdout
 
 
 async def merge_av(
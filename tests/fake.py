@@ -1,6 +1,8 @@
-from typing import TYPE_CHECKING, Literal
+from typing import TYPE_CHECKING, Literal, ClassVar
 
 if TYPE_CHECKING:
+    from types import SimpleNamespace
+
     from nonebot.adapters.onebot.v11 import GroupMessageEvent as GroupMessageEventV11
     from nonebot.adapters.onebot.v11 import (
         PrivateMessageEvent as PrivateMessageEventV11,
@@ -60,3 +62,51 @@ def fake_private_message_event_v11(**field) -> "PrivateMessageEventV11":
         to_me: bool = False
 
     return FakeEvent(**field)
+
+
+class FakeUploadAdapter:
+    """模拟 Telegram: 上传媒体后返回 file_id, 之后可以直接使用 file_id 发送
+
+    回执与 Telegram 相同: 每个媒体一条消息, 引用 file_id 发送的媒体同样带有 file_id,
+    视频的缩略图随视频发送, 不单独返回 file_id
+    """
+
+    name = "FakeUpload"
+    MEDIA_ATTRS: ClassVar[dict[str, str]] = {
+        "Image": "photo",
+        "Video": "video",
+        "Voice": "voice",
+        "Audio": "audio",
+        "File": "document",
+    }
+
+    def __init__(self):
+        self.uploads = 0
+        self.valid_ids: set[str] = set()
+
+    async def send(self, message) -> "SimpleNamespace":
+        """发送消息, 返回带有 msg_ids 的回执"""
+        from types import SimpleNamespace
+
+        from nonebot_plugin_alconna.uniseg import Text
+        from nonebot_plugin_alconna.uniseg.segment import Media
+
+        messages: list[SimpleNamespace] = []
+        if any(isinstance(seg, Text) for seg in message):
+            messages.append(SimpleNamespace(text="text"))
+        for seg in message:
+            if not isinstance(seg, Media):
+                continue
+            if seg.id is not None:
+                if seg.id not in self.valid_ids:
+                    raise RuntimeError(f"file_id {seg.id} 已失效")
+                file_id = seg.id
+            else:
+                self.uploads += 1
+                file_id = f"file-{self.uploads}"
+                self.valid_ids.add(file_id)
+            attr = self.MEDIA_ATTRS[type(seg).__name__]
+            media = SimpleNamespace(file_id=file_id)
+            # 图片返回多个尺寸
+            messages.append(SimpleNamespace(**{attr: [media] if attr == "photo" else media}))
+        return SimpleNamespace(msg_ids=messages)
@@ -1,3 +1,6 @@
+from pathlib import Path
+
+import pytest
 from nonebot import logger
 
 
@@ -40,3 +43,82 @@ def test_limited_size_dict():
     for i in range(20, 30):
         limited_size_dict[f"test{i}"] = f"test{i}"
     assert len(limited_size_dict) == 20
+
+
+def test_calc_video_bitrate():
+    from nonebot_plugin_parser.download.transcode import AUDIO_BITRATE, calc_video_bitrate
+
+    # 90 MB, 8 分钟
+    with_audio = calc_video_bitrate(90, 480, True)
+    without_audio = calc_video_bitrate(90, 480, False)
+    assert without_audio - with_audio == AUDIO_BITRATE
+    # 码率 * 时长 不超过目标大小
+    assert (with_audio + AUDIO_BITRATE) * 1000 * 480 / 8 <= 90 * 1024 * 1024
+    assert calc_video_bitrate(90, 960, True) < with_audio
+
+
+async def test_download_candidates(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    from nonebot_plugin_parser.config import pconfig
+    from nonebot_plugin_parser.parsers import BilibiliParser
+    from nonebot_plugin_parser.exception import SizeLimitException
+
+    calls: list[tuple[str, float | None]] = []
+
+    async def download_av(v_url: str, a_url: str | None, output_path: Path, max_size: float | None = None) -> Path:
+        calls.append((v_url, max_size))
+        if max_size is None:
+            raise SizeLimitException(100)
+        return output_path
+
+    parser = BilibiliParser()
+    monkeypatch.setattr(parser, "_download_av", download_av)
+    candidates = [("1080p", "audio"), ("720p", "audio"), ("480p", None)]
+    output_path = tmp_path / "video.mp4"
+
+    # 未启用时与原来一致, 只下载配置的画质
+    monkeypatch.setattr(pconfig, "parser_oversize_reencode", False)
+    with pytest.raises(SizeLimitException):
+        await parser._download_candidates(candidates, output_path)
+    assert calls == [("1080p", None)]
+
+    calls.clear()
+    monkeypatch.setattr(pconfig, "parser_oversize_reencode", True)
+    assert await parser._download_candidates(candidates, output_path) == output_path
+    source_max_size = parser.downloader.video_source_max_size
+    assert calls == [("1080p", None), ("720p", None), ("480p", None), ("480p", source_max_size)]
+
+
+async def test_fit_video_size(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    from nonebot_plugin_parser.config import pconfig
+    from nonebot_plugin_parser.download import transcode
+    from nonebot_plugin_parser.exception import SizeLimitException
+
+    monkeypatch.setattr(pconfig, "parser_max_size", 1)
+    video_path = tmp_path / "video.mp4"
+    video_path.write_bytes(b"\0" * 2 * 1024 * 1024)
+
+    # 未启用时不处理
+    monkeypatch.setattr(pconfig, "parser_oversize_reencode", False)
+    assert await transcode.fit_video_size(video_path) == video_path
+    assert video_path.stat().st_size == 2 * 1024 * 1024
+
+    async def compress(video_path: Path, max_size: float, **kwargs) -> Path:
+        video_path.write_bytes(b"\0" * 1024)
+        return video_path
+
+    monkeypatch.setattr(pconfig, "parser_oversize_reencode", True)
+    monkeypatch.setattr(transcode, "compress_video_to_size", compress)
+    assert await transcode.fit_video_size(video_path) == video_path
+    assert video_path.stat().st_size == 1024
+    # 重新编码完成后不保留锁
+    assert video_path not in transcode._fit_locks
+
+    async def compress_failed(video_path: Path, max_size: float, **kwargs) -> Path:
+        raise SizeLimitException(2)
+
+    video_path.write_bytes(b"\0" * 2 * 1024 * 1024)
+    monkeypatch.setattr(transcode, "compress_video_to_size", compress_failed)
+    with pytest.raises(SizeLimitException):
+        await transcode.fit_video_size(video_path)
+    # 超过大小限制的源文件不保留在缓存中
+    assert not video_path.exists()
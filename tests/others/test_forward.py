@@ -0,0 +1,60 @@
+from pathlib import Path
+
+import pytest
+
+
+def test_split_forward_message(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    from nonebot_plugin_alconna.uniseg import Image, Reference, CustomNode, UniMessage
+
+    from nonebot_plugin_parser.config import pconfig
+    from nonebot_plugin_parser.helper import UniHelper
+
+    monkeypatch.setattr(pconfig, "parser_forward_max_nodes", 4)
+    monkeypatch.setattr(pconfig, "parser_forward_max_size", 1)
+
+    image = tmp_path / "image.jpg"
+    image.write_bytes(b"\0" * 400 * 1024)
+    nodes = [CustomNode(uid="1", name="bot", content=f"text {i}") for i in range(5)]
+    nodes += [CustomNode(uid="1", name="bot", content=UniMessage(Image(path=image))) for _ in range(3)]
+
+    chunks = UniHelper.split_forward_message(Reference(nodes=nodes))
+    # 前 4 个文字节点达到节点数上限; 第 3 张图片超过 1 MB
+    assert [len(chunk.children) for chunk in chunks] == [4, 3, 1]
+    assert [node for chunk in chunks for node in chunk.children] == nodes
+
+
+def test_split_forward_message_default():
+    from nonebot_plugin_alconna.uniseg import Reference, CustomNode
+
+    from nonebot_plugin_parser.helper import UniHelper
+
+    # 默认不拆分
+    nodes = [CustomNode(uid="1", name="bot", content=f"text {i}") for i in range(50)]
+    assert len(UniHelper.split_forward_message(Reference(nodes=nodes))) == 1
+
+
+async def test_send_chunks_in_order(monkeypatch: pytest.MonkeyPatch):
+    import asyncio
+
+    from nonebot_plugin_alconna.uniseg import Reference, CustomNode, UniMessage
+
+    from nonebot_plugin_parser.helper import UniHelper
+
+    sent: list[str] = []
+
+    async def send(message: UniMessage):
+        chunk = message[0]
+        if not isinstance(chunk, Reference):
+            sent.append(str(message))
+            return
+        name = chunk.children[0].name
+        # 前面的分块发送得更慢, 也不能被后面的分块超过
+        await asyncio.sleep(0.02 * (3 - int(name)))
+        if name == "1":
+            raise RuntimeError("send failed")
+        sent.append(name)
+
+    monkeypatch.setattr(UniHelper, "send", send)
+    chunks = [Reference(nodes=[CustomNode(uid="1", name=str(i), content="text")]) for i in range(3)]
+    await UniHelper._send_chunks(chunks)
+    assert sent == ["0", "2", "合并转发消息共 3 条, 其中 1 条发送失败"]
@@ -0,0 +1,22 @@
+import base64
+from pathlib import Path
+
+import pytest
+
+
+def test_load_payload(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    from nonebot_plugin_parser import outgoing
+
+    monkeypatch.setattr(outgoing, "ENCODE_CHUNK", 3 * 5)
+    path = tmp_path / "media.bin"
+    data = bytes(range(256)) * 3 + b"tail"
+    path.write_bytes(data)
+
+    url = outgoing.load_payload(path, as_url=True)
+    assert url == f"base64://{base64.b64encode(data).decode()}"
+    assert outgoing.load_payload(path, as_url=False) == data
+
+    empty = tmp_path / "empty.bin"
+    empty.touch()
+    assert outgoing.load_payload(empty, as_url=True) == "base64://"
+    assert outgoing.load_payload(empty, as_url=False) == b""
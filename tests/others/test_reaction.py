@@ -0,0 +1,23 @@
+import asyncio
+
+import pytest
+
+
+async def test_dispatch_reaction(monkeypatch: pytest.MonkeyPatch):
+    from nonebot_plugin_parser.helper import UniHelper
+
+    sent: list[str] = []
+
+    async def message_reaction(event, status: str):
+        if status == "resolving":
+            await asyncio.sleep(0.1)
+        sent.append(status)
+
+    monkeypatch.setattr(UniHelper, "message_reaction", message_reaction)
+
+    resolving = UniHelper.dispatch_reaction(None, "resolving")  # type: ignore
+    # 调用方无需等待回应
+    assert sent == []
+    done = UniHelper.dispatch_reaction(None, "done", resolving)  # type: ignore
+    await asyncio.wait({done})
+    assert sent == ["resolving", "done"]
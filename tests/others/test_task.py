@@ -0,0 +1,54 @@
+from pathlib import Path
+
+
+async def test_lazy_path_task(tmp_path: Path):
+    from nonebot_plugin_parser.parsers.task import PathTask
+
+    started: list[str] = []
+
+    async def download() -> Path:
+        started.append("download")
+        return tmp_path
+
+    task = PathTask(download)
+    assert not task.done
+    assert started == []
+
+    task.prefetch()
+    task.prefetch()
+    assert await task.get() == tmp_path
+    assert task.done
+    assert started == ["download"]
+
+
+async def test_parsed_video_downloads_on_render(tmp_path: Path):
+    from PIL import Image
+
+    from nonebot_plugin_parser.parsers import Platform, ParseResult
+    from nonebot_plugin_parser.renders import DefaultRenderer
+    from nonebot_plugin_parser.parsers.base import BaseParser
+    from nonebot_plugin_parser.parsers.task import PathTask
+
+    started: list[str] = []
+    video_path = tmp_path / "video.mp4"
+    video_path.write_bytes(b"video")
+    cover_path = tmp_path / "cover.jpg"
+    Image.new("RGB", (64, 36)).save(cover_path)
+
+    async def download_video() -> Path:
+        started.append("video")
+        return video_path
+
+    async def download_cover() -> Path:
+        started.append("cover")
+        return cover_path
+
+    # 与 bilibili/youtube/tiktok 解析器相同, 传入工厂函数而不是已经开始的任务
+    video = BaseParser().create_video(download_video, duration=10)
+    video.cover = PathTask(download_cover)
+    result = ParseResult(platform=Platform(name="test", display_name="测试"), contents=[video])
+    assert started == []
+
+    messages = [message async for message in DefaultRenderer(result).render_contents()]
+    assert messages
+    assert sorted(started) == ["cover", "video"]
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+
+async def test_upload_cache(tmp_path: Path):
+    from nonebot_plugin_alconna.uniseg import Text, Image, UniMessage
+
+    from tests.fake import FakeUploadAdapter
+    from nonebot_plugin_parser import upload
+
+    adapter = FakeUploadAdapter()
+    upload.register_extractor(adapter.name)(upload._telegram_file_ids)
+
+    card = tmp_path / "card.png"
+    card.write_bytes(b"card")
+
+    def message() -> UniMessage:
+        return UniMessage([Text("card"), Image(path=card)])
+
+    await upload.send(message(), adapter.name, adapter.send)
+    assert adapter.uploads == 1
+
+    # 其他群再次发送, 直接引用 file_id
+    for _ in range(3):
+        await upload.send(message(), adapter.name, adapter.send)
+    assert adapter.uploads == 1
+
+    # file_id 失效后回退到重新上传, 并记录新的 file_id
+    adapter.valid_ids.clear()
+    await upload.send(message(), adapter.name, adapter.send)
+    await upload.send(message(), adapter.name, adapter.send)
+    assert adapter.uploads == 2
+
+
+async def test_upload_cache_mixed(tmp_path: Path):
+    from nonebot_plugin_alconna.uniseg import Image, Video, UniMessage
+
+    from tests.fake import FakeUploadAdapter
+    from nonebot_plugin_parser import upload
+
+    adapter = FakeUploadAdapter()
+    upload.register_extractor(adapter.name)(upload._telegram_file_ids)
+
+    paths: dict[str, Path] = {}
+    for name in ("a.jpg", "b.jpg", "video.mp4", "thumb.jpg"):
+        paths[name] = tmp_path / name
+        paths[name].write_bytes(name.encode())
+
+    # 视频带缩略图时, 回执中只有视频的 file_id
+    def video() -> UniMessage:
+        return UniMessage([Video(path=paths["video.mp4"], thumbnail=Image(path=paths["thumb.jpg"]))])
+
+    await upload.send(video(), adapter.name, adapter.send)
+    await upload.send(video(), adapter.name, adapter.send)
+    assert adapter.uploads == 1
+
+    # 部分命中时, 新上传的媒体同样记录 file_id
+    await upload.send(UniMessage([Image(path=paths["a.jpg"])]), adapter.name, adapter.send)
+    assert adapter.uploads == 2
+
+    def images() -> UniMessage:
+        return UniMessage([Image(path=paths["a.jpg"]), Image(path=paths["b.jpg"])])
+
+    await upload.send(images(), adapter.name, adapter.send)
+    assert adapter.uploads == 3
+    await upload.send(images(), adapter.name, adapter.send)
+    assert adapter.uploads == 3
@@ -29,3 +29,42 @@ async def test_clean_plugin_cache():
     from nonebot_plugin_parser import clean_plugin_cache
 
     await clean_plugin_cache()
+
+
+def test_atomic_write(tmp_path):
+    import pytest
+
+    from nonebot_plugin_parser.utils import atomic_write
+
+    target = tmp_path / "out.bin"
+    atomic_write(target, lambda f: f.write(b"data"))
+    assert target.read_bytes() == b"data"
+
+    def broken(f):
+        f.write(b"partial")
+        raise OSError("disk full")
+
+    # 写入失败时保留原文件, 并清理临时文件
+    with pytest.raises(OSError, match="disk full"):
+        atomic_write(target, broken)
+    assert target.read_bytes() == b"data"
+    assert [p.name for p in tmp_path.iterdir()] == ["out.bin"]
+
+
+async def test_async_atomic_write(tmp_path):
+    import pytest
+
+    from nonebot_plugin_parser.utils import async_atomic_write
+
+    target = tmp_path / "out.bin"
+    await async_atomic_write(target, lambda f: f.write(b"data"))
+    assert target.read_bytes() == b"data"
+
+    async def broken(f):
+        await f.write(b"partial")
+        raise OSError("disk full")
+
+    with pytest.raises(OSError, match="disk full"):
+        await async_atomic_write(target, broken)
+    assert target.read_bytes() == b"data"
+    assert [p.name for p in tmp_path.iterdir()] == ["out.bin"]
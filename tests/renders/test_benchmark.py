@@ -0,0 +1,277 @@
+"""离线渲染基准, 使用内置图片构造解析结果, 不访问网络
+
+设置环境变量 PARSER_BENCHMARK=1 后运行, 结果写入 PARSER_BENCHMARK_OUTPUT (默认为临时目录下的
+render_benchmark.json), 包含每个场景、每个渲染器 (common / htmlkit / htmlrender / default, 未安装的渲染器跳过)
+的墙钟耗时、CPU 耗时、峰值 RSS 与输出大小
+
+峰值 RSS 在独立的子进程中单独渲染一次测得, 不受同一进程中其他场景的影响
+"""
+
+import os
+import sys
+import json
+import time
+import subprocess
+from typing import TYPE_CHECKING, Any
+from pathlib import Path
+from contextlib import suppress
+from collections.abc import Callable, Awaitable
+
+import pytest
+from nonebot import logger
+
+if TYPE_CHECKING:
+    from nonebug import App
+
+    from nonebot_plugin_parser.parsers import ParseResult
+
+BENCHMARK_FILE = "render_benchmark.json"
+BENCHMARK_ENV = "PARSER_BENCHMARK"
+OUTPUT_ENV = "PARSER_BENCHMARK_OUTPUT"
+CASE_ENV = "PARSER_BENCHMARK_CASE"
+"""子进程中要测量的 场景:渲染器"""
+RSS_FILE_ENV = "PARSER_BENCHMARK_RSS_FILE"
+"""子进程写入峰值 RSS 的文件"""
+EMOJIS = ["😀", "😂", "👍", "🎉", "🔥", "🙏", "🤔", "😭"]
+
+
+def _fallback_pic(index: int) -> Path:
+    from nonebot_plugin_parser.renders.resources import FALLBACK_PIC_DIR
+
+    return FALLBACK_PIC_DIR / f"{index % 9 + 1}.jpg"
+
+
+def _path_task(path: Path):
+    from nonebot_plugin_parser.parsers.task import PathTask
+
+    async def local() -> Path:
+        return path
+
+    return PathTask(local())
+
+
+def _image(index: int, alt: str | None = None):
+    from nonebot_plugin_parser.parsers import ImageContent
+
+    return ImageContent(_path_task(_fallback_pic(index)), alt=alt)
+
+
+def _result(text: str | None = None, **kwargs: Any) -> "ParseResult":
+    from nonebot_plugin_parser.parsers import Author, Platform, ParseResult
+    from nonebot_plugin_parser.renders.resources import DEFAULT_AVATAR_PATH
+
+    return ParseResult(
+        platform=Platform(name="bilibili", display_name="哔哩哔哩"),
+        author=Author(name="benchmark", avatar=_path_task(DEFAULT_AVATAR_PATH), description="离线渲染基准"),
+        title="离线渲染基准",
+        text=text,
+        timestamp=1700000000,
+        url="https://example.com/benchmark",
+        **kwargs,
+    )
+
+
+def _build_cases() -> dict[str, Callable[[], "ParseResult"]]:
+    """每次调用都重新构造, 避免 PathTask 在不同渲染器之间复用"""
+    from nonebot_plugin_parser.parsers import VideoContent
+
+    paragraph = "这是一段用于渲染基准的正文, 包含中文、English words 与数字 1234567890。"
+
+    def video() -> "ParseResult":
+        cover = _fallback_pic(0)
+        content = VideoContent(_path_task(cover), cover=_path_task(cover), duration=300)
+        return _result(paragraph, contents=[content])
+
+    def opus() -> "ParseResult":
+        graphics: list = []
+        for i in range(25):
+            graphics.append(f"第 {i} 段. {paragraph}")
+            graphics.append(_image(i, alt=f"第 {i} 张图"))
+        return _result(paragraph, graphics=graphics)
+
+    def repost() -> "ParseResult":
+        inner = _result(paragraph, contents=[_image(i) for i in range(4)])
+        middle = _result(paragraph * 2, contents=[_image(0)], repost=inner)
+        return _result(paragraph, repost=middle)
+
+    return {
+        "text_only": lambda: _result("\n".join([paragraph] * 20)),
+        "video_cover": video,
+        "grid_1": lambda: _result(paragraph, contents=[_image(0)]),
+        "grid_4": lambda: _result(paragraph, contents=[_image(i) for i in range(4)]),
+        "grid_12": lambda: _result(paragraph, contents=[_image(i) for i in range(12)]),
+        "opus_50": opus,
+        "nested_repost": repost,
+        "emoji_text": lambda: _result("\n".join(f"{i} {''.join(EMOJIS)} {paragraph}" for i in range(30))),
+    }
+
+
+def _message_size(message: Any) -> int:
+    """消息中文本与图片的总字节数"""
+    from nonebot_plugin_alconna.uniseg import Text, Image, Reference, CustomNode
+
+    size = 0
+    for seg in message:
+        if isinstance(seg, str):
+            size += len(seg.encode())
+        elif isinstance(seg, Text):
+            size += len(seg.text.encode())
+        elif isinstance(seg, Image):
+            if seg.raw is not None:
+                size += len(seg.raw) if isinstance(seg.raw, bytes) else len(seg.raw.getvalue())
+            elif seg.path is not None:
+                size += Path(seg.path).stat().st_size
+        elif isinstance(seg, Reference):
+            size += sum(_message_size(node.content) for node in seg.children if isinstance(node, CustomNode))
+    return size
+
+
+async def _measure(render: Callable[[], Awaitable[int]]) -> dict[str, float]:
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    output_bytes = await render()
+    return {
+        "wall_ms": round((time.perf_counter() - wall) * 1000, 2),
+        # 渲染池为线程池时包含池内耗时, 为进程池时只包含事件循环侧
+        "cpu_ms": round((time.process_time() - cpu) * 1000, 2),
+        "output_bytes": output_bytes,
+    }
+
+
+def _measure_rss(case: str, renderer: str, tmp_path: Path) -> dict[str, int]:
+    """在新的子进程中单独渲染一次, 返回渲染前的 RSS 和渲染期间的峰值 RSS (Linux 下单位为 KB)"""
+    name = f"{case}.{renderer}"
+    rss_file = tmp_path / f"{name}.rss.json"
+    env = {**os.environ, CASE_ENV: f"{case}:{renderer}", RSS_FILE_ENV: str(rss_file)}
+    # 子进程使用独立的临时目录, 避免 pytest 轮换清理当前进程的临时目录
+    command = [
+        sys.executable,
+        "-m",
+        "pytest",
+        f"{__file__}::test_render_rss",
+        "-q",
+        "-p",
+        "no:cacheprovider",
+        f"--basetemp={tmp_path / name}",
+    ]
+    subprocess.run(command, env=env, check=True, capture_output=True)
+    return json.loads(rss_file.read_text())
+
+
+def _make_atlas(directory: Path) -> Path:
+    from PIL import Image, ImageDraw
+
+    for i, char in enumerate(EMOJIS):
+        image = Image.new("RGBA", (72, 72), (0, 0, 0, 0))
+        ImageDraw.Draw(image).ellipse((0, 0, 71, 71), fill=(i * 30, 200, 100, 255))
+        image.save(directory / f"{ord(char):x}.png")
+    return directory
+
+
+def _renderers() -> dict[str, Callable[["ParseResult"], Awaitable[int]]]:
+    """可用的渲染器, 返回渲染结果的总字节数"""
+    from nonebot_plugin_parser.utils import is_module_available
+    from nonebot_plugin_parser.renders import DefaultRenderer
+    from nonebot_plugin_parser.renders.base import ImageRenderer
+    from nonebot_plugin_parser.renders.common.renderer import CommonRenderer
+
+    image_renderers: dict[str, type[ImageRenderer]] = {"common": CommonRenderer}
+    if is_module_available("nonebot_plugin_htmlkit"):
+        from nonebot_plugin_parser.renders.htmlkit import HtmlKitRenderer
+
+        image_renderers["htmlkit"] = HtmlKitRenderer
+    if is_module_available("nonebot_plugin_htmlrender"):
+        from nonebot_plugin_parser.renders.htmlrender import HtmlRenderer
+
+        # 浏览器是独立进程, 其内存不计入 peak_rss_kb
+        image_renderers["htmlrender"] = HtmlRenderer
+
+    def render_image(renderer: type[ImageRenderer]) -> Callable[["ParseResult"], Awaitable[int]]:
+        async def render(result: "ParseResult") -> int:
+            return sum([len(page) async for page in renderer(result).render_pages()])
+
+        return render
+
+    async def render_default(result: "ParseResult") -> int:
+        return sum([_message_size(message) async for message in DefaultRenderer(result).render_messages()])
+
+    renderers = {key: render_image(renderer) for key, renderer in image_renderers.items()}
+    renderers["default"] = render_default
+    return renderers
+
+
+def _peak_rss_kb() -> int:
+    """当前进程的峰值 RSS (KB)
+
+    优先读取 /proc 中的 VmHWM, ru_maxrss 在 exec 后保留了父进程 fork 时的 RSS, 且不会被 clear_refs 重置
+    """
+    import resource
+
+    with suppress(OSError):
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+@pytest.fixture
+async def benchmark_env(app: "App", tmp_path: Path):
+    """替换 emoji 图集, 并为合并转发消息提供 bot 的 self_id"""
+    from nonebot.matcher import current_bot
+
+    from nonebot_plugin_parser.renders.common import assets
+    from nonebot_plugin_parser.renders.common.atlas import EmojiAtlas
+
+    assets.ensure_resources()
+    old_atlas = assets.EMOJI_ATLAS
+    assets.EMOJI_ATLAS = EmojiAtlas(_make_atlas(tmp_path))
+
+    async with app.test_api() as ctx:
+        token = current_bot.set(ctx.create_bot())
+        try:
+            yield
+        finally:
+            current_bot.reset(token)
+            assets.EMOJI_ATLAS = old_atlas
+
+
+@pytest.mark.skipif(not os.getenv(CASE_ENV), reason="仅在基准子进程中运行")
+async def test_render_rss(benchmark_env: None):
+    pytest.importorskip("resource")
+    case, key = os.environ[CASE_ENV].split(":")
+    render = _renderers()[key]
+    build = _build_cases()[case]
+
+    # 重置峰值 RSS (Linux 4.0+), 排除启动和加载插件时的峰值
+    with suppress(OSError):
+        Path("/proc/self/clear_refs").write_text("5")
+    rss = _peak_rss_kb()
+    await render(build())
+    peak_rss = _peak_rss_kb()
+    result = {"peak_rss_kb": peak_rss, "peak_rss_delta_kb": peak_rss - rss}
+    Path(os.environ[RSS_FILE_ENV]).write_text(json.dumps(result))
+
+
+@pytest.mark.skipif(not os.getenv(BENCHMARK_ENV), reason=f"设置 {BENCHMARK_ENV}=1 后运行")
+async def test_render_benchmark(benchmark_env: None, tmp_path: Path):
+    from nonebot_plugin_parser.utils import is_module_available
+
+    renderers = _renderers()
+    # resource 模块仅在 Unix 上可用, 其余平台只记录耗时
+    measure_rss = is_module_available("resource")
+    report: dict[str, dict[str, dict[str, float]]] = {}
+    for name, build in _build_cases().items():
+        report[name] = {}
+        for key, render in renderers.items():
+            metrics = await _measure(lambda: render(build()))
+            if measure_rss:
+                metrics.update(_measure_rss(name, key, tmp_path))
+            report[name][key] = metrics
+
+    assert all(metrics["output_bytes"] > 0 for case in report.values() for metrics in case.values())
+    output = Path(os.getenv(OUTPUT_ENV) or tmp_path / BENCHMARK_FILE)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+    logger.info(f"基准结果已写入 {output}")
+    for name, case in report.items():
+        summary = ", ".join(f"{key} {metrics['wall_ms']} ms" for key, metrics in case.items())
+        logger.info(f"{name}: {summary}")
@@ -0,0 +1,100 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+
+def test_prune_card_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    from nonebot_plugin_parser.config import pconfig
+    from nonebot_plugin_parser.renders import cache
+
+    monkeypatch.setattr(cache, "CARD_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(pconfig, "parser_card_cache_max_size", 1)
+
+    now = time.time()
+    # 三张 400 KB 的卡片, 按使用时间先后排列; 以及一个过期卡片和一个中断的渲染
+    for i, key in enumerate(("a" * 32, "b" * 32, "c" * 32, "d" * 32)):
+        page = cache.page_path(key, 0, ".png")
+        page.write_bytes(b"\0" * 400 * 1024)
+        cache.save_pages(key, [page])
+        age = 30 * 86400 if key[0] == "d" else 100 - i
+        os.utime(tmp_path / f"{key}.json", (now - age, now - age))
+    orphan = cache.page_path("e" * 32, 0, ".png")
+    orphan.write_bytes(b"\0")
+    os.utime(orphan, (now - 7200, now - 7200))
+
+    cache.prune_card_cache()
+
+    assert cache.load_pages("a" * 32) is None
+    assert cache.load_pages("d" * 32) is None
+    assert cache.load_pages("b" * 32) == [cache.page_path("b" * 32, 0, ".png")]
+    assert cache.load_pages("c" * 32) is not None
+    assert not orphan.exists()
+
+
+async def test_card_cache_key_without_download():
+    from nonebot_plugin_parser.parsers import Author, Platform, ParseResult, ImageContent
+    from nonebot_plugin_parser.renders import cache
+    from nonebot_plugin_parser.parsers.task import PathTask
+
+    started: list[str] = []
+
+    def lazy(url: str | None) -> PathTask:
+        async def download() -> Path:
+            started.append(url or "")
+            raise RuntimeError("不应下载")
+
+        return PathTask(download, source=url)
+
+    def build(*urls: str | None) -> ParseResult:
+        return ParseResult(
+            platform=Platform(name="test", display_name="测试"),
+            author=Author(name="tester", avatar=lazy("https://example.com/avatar.jpg")),
+            text="正文",
+            contents=[ImageContent(lazy(url)) for url in urls],
+        )
+
+    key = cache.card_cache_key(build("https://example.com/1.jpg"), "CommonRenderer", True)
+    assert key is not None
+    assert cache.card_cache_key(build("https://example.com/1.jpg"), "CommonRenderer", True) == key
+    assert cache.card_cache_key(build("https://example.com/2.jpg"), "CommonRenderer", True) != key
+    # 没有来源且未下载完成的媒体无法标识
+    assert cache.card_cache_key(build(None), "CommonRenderer", True) is None
+    assert started == []
+
+    # 有媒体下载失败时不持久化
+    result = build("https://example.com/1.jpg")
+    assert not cache.media_failed(result)
+    assert await result.contents[0].path_task.safe_get() is None
+    assert cache.media_failed(result)
+
+
+async def test_save_img_concurrent(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    import asyncio
+
+    from nonebot_plugin_parser.renders import cache
+    from nonebot_plugin_parser.renders.base import ImageRenderer
+
+    monkeypatch.setattr(cache, "CARD_CACHE_DIR", tmp_path)
+
+    pages = [b"\x89PNG" + bytes([i]) * 1024 * 1024 for i in range(4)]
+    paths = await asyncio.gather(*(ImageRenderer.save_img(page, "a" * 32, 0) for page in pages))
+
+    assert len(set(paths)) == 1
+    assert paths[0].read_bytes() in pages
+    assert [path.name for path in tmp_path.iterdir()] == [paths[0].name]
+
+
+async def test_clean_plugin_cache_empty(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    import nonebot_plugin_parser
+    from nonebot_plugin_parser import config
+
+    called: list[str] = []
+    monkeypatch.setattr(config, "_cache_dir", tmp_path)
+    monkeypatch.setattr(nonebot_plugin_parser, "clear_result_cache", lambda: called.append("result"))
+    monkeypatch.setattr(nonebot_plugin_parser, "prune_card_cache", lambda: called.append("card"))
+
+    # 缓存目录为空时仍然清理 result 缓存和卡片缓存
+    await nonebot_plugin_parser.clean_plugin_cache()
+    assert called == ["result", "card"]
@@ -0,0 +1,88 @@
+from pathlib import Path
+
+import pytest
+
+
+def test_compress_image(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    from PIL import Image
+
+    from nonebot_plugin_parser import config
+    from nonebot_plugin_parser.renders.compress import compress_image
+
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    monkeypatch.setattr(config, "_cache_dir", cache_dir)
+
+    path = tmp_path / "large.png"
+    Image.effect_noise((3000, 2000), 64).convert("RGB").save(path)
+
+    compressed = compress_image(path, 1024, 200 * 1024)
+    assert compressed != path
+    assert compressed.stat().st_size <= 200 * 1024
+    with Image.open(compressed) as img:
+        assert img.size == (1024, 683)
+    # 第二次直接使用缓存
+    assert compress_image(path, 1024, 200 * 1024) == compressed
+
+    small = tmp_path / "small.jpg"
+    Image.new("RGB", (100, 100)).save(small)
+    assert compress_image(small, 1024, 200 * 1024) == small
+
+    transparent = tmp_path / "transparent.png"
+    Image.new("RGBA", (2000, 2000)).save(transparent)
+    assert compress_image(transparent, 1024, 0) == transparent
+
+
+def test_compress_image_concurrent(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from PIL import Image
+
+    from nonebot_plugin_parser import config
+    from nonebot_plugin_parser.renders.compress import compress_image
+
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    monkeypatch.setattr(config, "_cache_dir", cache_dir)
+
+    path = tmp_path / "cover.png"
+    Image.effect_noise((2000, 1500), 64).convert("RGB").save(path)
+
+    # 预览和缩略图同时压缩同一张封面
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: compress_image(path, 800, 0), range(8)))
+
+    assert len(set(results)) == 1
+    with Image.open(results[0]) as img:
+        assert img.size == (800, 600)
+    assert [file.name for file in cache_dir.iterdir()] == [results[0].name]
+
+
+def test_compress_image_orientation_and_key(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    from PIL import Image
+
+    from nonebot_plugin_parser import config
+    from nonebot_plugin_parser.renders.compress import compress_image
+
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    monkeypatch.setattr(config, "_cache_dir", cache_dir)
+
+    # 手机拍摄的竖图: 像素横向存储, EXIF 标记需要顺时针旋转 90 度
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    rotated = tmp_path / "rotated.jpg"
+    Image.effect_noise((2000, 1000), 64).convert("RGB").save(rotated, exif=exif)
+    with Image.open(compress_image(rotated, 1000, 0)) as img:
+        assert img.size == (500, 1000)
+
+    # 不同目录下的同名图片不共用缓存
+    outputs = []
+    for i, color in enumerate(((255, 0, 0), (0, 0, 255))):
+        (tmp_path / str(i)).mkdir()
+        path = tmp_path / str(i) / "0.jpg"
+        Image.new("RGB", (2000, 2000), color).save(path)
+        outputs.append(compress_image(path, 1000, 0))
+    assert outputs[0] != outputs[1]
+    with Image.open(outputs[1]) as img:
+        assert img.getpixel((0, 0))[2] > 200
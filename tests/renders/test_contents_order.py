@@ -0,0 +1,56 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+
+def _contents(delay: float) -> list:
+    from nonebot_plugin_parser.parsers import ImageContent, VideoContent
+    from nonebot_plugin_parser.parsers.task import PathTask
+    from nonebot_plugin_parser.renders.resources import FALLBACK_PIC_DIR
+
+    async def local(path: Path, delay: float = 0) -> Path:
+        await asyncio.sleep(delay)
+        return path
+
+    pic = FALLBACK_PIC_DIR / "1.jpg"
+    return [
+        VideoContent(PathTask(local(pic, delay))),
+        ImageContent(PathTask(local(pic))),
+        VideoContent(PathTask(local(pic))),
+        ImageContent(PathTask(local(pic))),
+    ]
+
+
+@pytest.mark.parametrize(
+    ("order", "expected"),
+    [
+        ("strict", ["video", "video", "image"]),
+        ("ready", ["video", "image", "video"]),
+        ("hybrid", ["image", "video", "video"]),
+    ],
+)
+async def test_contents_order(order: str, expected: list[str], monkeypatch: pytest.MonkeyPatch):
+    from nonebot_plugin_alconna.uniseg import Image, Video
+
+    from nonebot_plugin_parser.config import pconfig
+    from nonebot_plugin_parser.parsers import Author, Platform, ParseResult
+    from nonebot_plugin_parser.constants import ContentsOrder
+    from nonebot_plugin_parser.renders.default import DefaultRenderer
+
+    monkeypatch.setattr(pconfig, "parser_contents_order", ContentsOrder(order))
+    monkeypatch.setattr(pconfig, "parser_need_forward_contents", False)
+
+    result = ParseResult(
+        platform=Platform(name="bilibili", display_name="哔哩哔哩"),
+        author=Author(name="order"),
+        contents=_contents(0.2),
+    )
+    kinds: list[str] = []
+    async for message in DefaultRenderer(result).render_contents():
+        if message.has(Video):
+            kinds.append("video")
+        elif message.has(Image):
+            assert len(message[Image]) == 2
+            kinds.append("image")
+    assert kinds == expected
@@ -0,0 +1,95 @@
+import time
+from pathlib import Path
+
+import pytest
+from nonebot import logger
+
+
+def _make_jpeg(path: Path, size: tuple[int, int]) -> Path:
+    from PIL import Image
+
+    Image.linear_gradient("L").resize(size).convert("RGB").save(path, quality=90)
+    return path
+
+
+def test_decode_image_draft(tmp_path: Path):
+    from nonebot_plugin_parser.renders.common.decode import decode_image
+
+    path = _make_jpeg(tmp_path / "large.jpg", (4000, 3000))
+    img = decode_image(path, 300, 300, cover=True)
+    # 不小于目标尺寸的 REDUCING_GAP 倍, 且明显小于原图
+    assert min(img.size) >= 600
+    assert img.width < 4000
+
+
+def test_decode_image_limit(tmp_path: Path):
+    from PIL import Image
+
+    from nonebot_plugin_parser.renders.common.decode import DecodeLimitError, decode_image
+
+    # PNG 无法按比例解码, 超长图直接拒绝
+    path = tmp_path / "long.png"
+    Image.new("RGB", (2000, 20000)).save(path)
+    with pytest.raises(DecodeLimitError):
+        decode_image(path, 750)
+
+
+def test_decode_long_image(tmp_path: Path):
+    from PIL import Image
+
+    from nonebot_plugin_parser.renders.common.decode import decode_image
+
+    # 1080x20000 的长图, 缩放到 704 宽后只保留顶部 4000 像素
+    png = tmp_path / "long.png"
+    Image.linear_gradient("L").resize((1080, 20000)).save(png)
+    img = decode_image(png, 704, max_height=4000)
+    # PNG 无法缩放解码, 完整解码 (受像素上限约束) 后裁剪顶部
+    assert img.size == (1080, 6137)
+    assert img.getpixel((0, 6136)) == Image.open(png).getpixel((0, 6136))
+
+    jpeg = _make_jpeg(tmp_path / "long.jpg", (1080, 20000))
+    img = decode_image(jpeg, 704, max_height=4000)
+    assert img.width == 704
+    assert abs(img.height - 4000) <= 2
+
+
+def test_decode_benchmark(tmp_path: Path):
+    from PIL import Image
+
+    from nonebot_plugin_parser.renders.common.decode import decode_image
+
+    # 一张卡片: 头像 + 9 宫格
+    avatar = _make_jpeg(tmp_path / "avatar.jpg", (1080, 1080))
+    grid = [_make_jpeg(tmp_path / f"{i}.jpg", (4032, 3024)) for i in range(9)]
+    grid_size = 244
+
+    def full_decode() -> int:
+        peak = 0
+        for path, size in ((avatar, 80), *((p, grid_size) for p in grid)):
+            with Image.open(path) as img:
+                img.load()
+                peak = max(peak, len(img.getbands()) * img.width * img.height)
+                img.resize((size, size), Image.Resampling.LANCZOS)
+        return peak
+
+    def reduced_decode() -> int:
+        peak = 0
+        for path, size in ((avatar, 80), *((p, grid_size) for p in grid)):
+            img = decode_image(path, size, size, cover=True)
+            peak = max(peak, len(img.getbands()) * img.width * img.height)
+            img.resize((size, size), Image.Resampling.LANCZOS)
+        return peak
+
+    start = time.perf_counter()
+    full_peak = full_decode()
+    full_cost = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reduced_peak = reduced_decode()
+    reduced_cost = time.perf_counter() - start
+
+    assert reduced_peak < full_peak
+    logger.info(
+        f"完整解码: {full_cost * 1000:.1f} ms, 单张解码缓冲 {full_peak / 1024 / 1024:.1f} MB; "
+        f"降采样解码: {reduced_cost * 1000:.1f} ms, 单张解码缓冲 {reduced_peak / 1024 / 1024:.1f} MB"
+    )
@@ -0,0 +1,52 @@
+import time
+from pathlib import Path
+
+from nonebot import logger
+
+EMOJIS = ["😀", "😂", "👍", "❤", "🎉", "🔥", "🙏", "🤔", "👨‍👩‍👧", "🇨🇳"]
+
+
+def _make_atlas(directory: Path) -> Path:
+    from PIL import Image, ImageDraw
+
+    for i, char in enumerate(EMOJIS):
+        image = Image.new("RGBA", (72, 72), (0, 0, 0, 0))
+        ImageDraw.Draw(image).ellipse((0, 0, 71, 71), fill=(i * 25, 200, 100, 255))
+        image.save(directory / f"{'-'.join(f'{ord(c):x}' for c in char)}.png")
+    return directory
+
+
+def test_parse_emoji_file_name():
+    from nonebot_plugin_parser.renders.common.atlas import parse_emoji_file_name
+
+    assert parse_emoji_file_name("1f600") == "😀"
+    assert parse_emoji_file_name("emoji_u1f600") == "😀"
+    assert parse_emoji_file_name("2764-fe0f") == "❤"
+    assert parse_emoji_file_name("1f468-200d-1f469-200d-1f467") == "👨‍👩‍👧"
+    assert parse_emoji_file_name("readme") is None
+
+
+async def test_emoji_atlas_benchmark(tmp_path: Path):
+    from nonebot_plugin_parser.renders.common import assets
+    from nonebot_plugin_parser.renders.common.atlas import EmojiAtlas
+    from nonebot_plugin_parser.renders.common.painter import CardData, paint_card
+    from nonebot_plugin_parser.renders.common.renderer import CommonRenderer
+
+    assets.ensure_resources()
+    text = "\n".join(f"第 {i} 行 {''.join(EMOJIS)} 没有表情的行" for i in range(50))
+    card = CardData(platform="test", author="tester", title="emoji 测试", text=text)
+
+    old_atlas = assets.EMOJI_ATLAS
+    assets.EMOJI_ATLAS = EmojiAtlas(_make_atlas(tmp_path))
+    try:
+        costs: list[float] = []
+        for _ in range(2):
+            start = time.perf_counter()
+            emojis = await CommonRenderer._render_emojis(card)
+            paint_card(card, emojis)
+            costs.append(time.perf_counter() - start)
+    finally:
+        assets.EMOJI_ATLAS = old_atlas
+
+    assert all(sprite.getbbox() for sprite in emojis.values())
+    logger.info(f"离线图集渲染耗时: 冷缓存 {costs[0] * 1000:.1f} ms, 热缓存 {costs[1] * 1000:.1f} ms")
@@ -0,0 +1,34 @@
+def _text_card():
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGB", (800, 2000), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    for y in range(0, 2000, 30):
+        draw.text((25, y), "测试文本 text 1234567890 " * 3, fill=(51, 51, 51))
+    return image
+
+
+def test_encode_card_budget(monkeypatch):
+    from nonebot_plugin_parser import pconfig
+    from nonebot_plugin_parser.renders.base import ImageRenderer
+    from nonebot_plugin_parser.renders.common.encode import encode_card
+
+    image = _text_card()
+    png = encode_card(image)
+    assert ImageRenderer.guess_suffix(png) == ".png"
+
+    monkeypatch.setattr(pconfig, "parser_card_max_size", max(len(png) // 1024 // 2, 1))
+    data = encode_card(image)
+    assert len(data) < len(png)
+
+
+def test_encode_card_format(monkeypatch):
+    from nonebot_plugin_parser import pconfig
+    from nonebot_plugin_parser.constants import ImageFormat
+    from nonebot_plugin_parser.renders.base import ImageRenderer
+    from nonebot_plugin_parser.renders.common.encode import encode_card
+
+    image = _text_card()
+    for fmt, suffix in ((ImageFormat.jpeg, ".jpg"), (ImageFormat.webp, ".webp")):
+        monkeypatch.setattr(pconfig, "parser_card_format", fmt)
+        assert ImageRenderer.guess_suffix(encode_card(image)) == suffix
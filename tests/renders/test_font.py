@@ -28,3 +28,16 @@ def test_cjk_width():
             count += 1
     cjk_count = ord("\u9fff") - ord("\u4e00") + 1
     logger.info(f"CJK 字符数: {cjk_count}，不等于 CJK 宽度的字符数: {count}，占比: {count / cjk_count:.2%}")
+
+
+def test_width_table():
+    from nonebot_plugin_parser.renders.common import assets
+
+    assets.ensure_resources()
+    metrics = assets.FONTS.body.metrics
+    assert len(metrics.widths) > 0
+
+    text = "中文 English 123，。！？ かなカナ 한국어"
+    for char in text:
+        assert abs(metrics.get_char_width(char) - metrics.font.getlength(char)) <= 1, char
+    assert metrics.get_text_width(text) == sum(metrics.get_char_width(char) for char in text)
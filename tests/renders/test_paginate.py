@@ -0,0 +1,64 @@
+def test_paint_pages():
+    from nonebot_plugin_parser.renders.common import assets
+    from nonebot_plugin_parser.renders.common.painter import CardData, CardPainter
+
+    assets.ensure_resources()
+    text = "\n".join(f"第 {i} 段, 用于测试超长图文的分页渲染" for i in range(200))
+    card = CardData(platform="test", author="tester", title="分页测试", text=text)
+
+    full = CardPainter(card, {}).paint()
+    pages = list(CardPainter(card, {}).paint_pages(1000))
+
+    assert len(pages) > 1
+    assert all(page.height <= 1000 for page in pages)
+    # 分页只增加每页的上下边距
+    padding = CardPainter.PADDING * 2
+    assert sum(page.height - padding for page in pages) == full.height - padding
+
+
+def test_paint_pages_decode_lazily(tmp_path, monkeypatch):
+    from PIL import Image
+
+    from nonebot_plugin_parser.renders.common import assets, painter
+    from nonebot_plugin_parser.renders.common.painter import CardData, CardPainter, GraphicsImage
+
+    assets.ensure_resources()
+    paths = []
+    for i, (size, fmt) in enumerate([((1200, 900), "JPEG"), ((300, 6000), "PNG"), ((1080, 20000), "JPEG")]):
+        path = tmp_path / f"{i}.{fmt.lower()}"
+        Image.new("RGB", size, (i * 80, 100, 200)).save(path, fmt)
+        paths.append(path)
+
+    decoded: list[str] = []
+    decode_image = painter.decode_image
+
+    def counting_decode(path, *args, **kwargs):
+        decoded.append(path.name)
+        return decode_image(path, *args, **kwargs)
+
+    monkeypatch.setattr(painter, "decode_image", counting_decode)
+
+    graphics: list[str | GraphicsImage] = []
+    for path in paths:
+        graphics.extend(["段落\n" * 20, GraphicsImage(path)])
+    repost = CardData(platform="test", author="reposter", grid=paths[:2], grid_total=2)
+    card = CardData(platform="test", author="tester", graphics=graphics, repost=repost)
+
+    # 测量阶段只读取文件头
+    blocks = CardPainter(card, {})._measure()
+    assert blocks
+    assert decoded == []
+
+    full = CardPainter(card, {}).paint()
+    assert len(decoded) == 5
+    decoded.clear()
+
+    # 逐页解码, 每张图片只解码一次, 且只在所在页绘制时解码
+    pages = CardPainter(card, {}).paint_pages(2000)
+    first = next(pages)
+    assert 0 < len(decoded) < 5
+    rest = list(pages)
+    assert len(decoded) == 5
+
+    padding = CardPainter.PADDING * 2
+    assert sum(page.height - padding for page in [first, *rest]) == full.height - padding
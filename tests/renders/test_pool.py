@@ -0,0 +1,30 @@
+import time
+import asyncio
+
+
+async def test_iter_in_pool_cancel():
+    from nonebot_plugin_parser.renders.pool import iter_in_pool
+
+    closed: list[bool] = []
+
+    def slow_pages():
+        try:
+            for i in range(3):
+                time.sleep(0.2)
+                yield i
+        finally:
+            closed.append(True)
+
+    items: list[int] = []
+
+    async def consume():
+        async for item in iter_in_pool(slow_pages):
+            items.append(item)
+
+    task = asyncio.create_task(consume())
+    await asyncio.sleep(0.3)
+    # 第二步仍在池中执行时取消
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    assert items == [0]
+    assert closed == [True]
@@ -0,0 +1,57 @@
+from pathlib import Path
+
+import pytest
+
+
+def test_make_variant(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    from PIL import Image
+
+    from nonebot_plugin_parser import config
+    from nonebot_plugin_parser.renders.variants import grid_box, make_variant
+
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    monkeypatch.setattr(config, "_cache_dir", cache_dir)
+
+    path = tmp_path / "large.jpg"
+    Image.linear_gradient("L").resize((4000, 3000)).convert("RGB").save(path)
+
+    fitted = make_variant(path, 1408)
+    with Image.open(fitted) as img:
+        assert img.size == (1408, 1056)
+
+    size = grid_box(3)[0] * 2
+    cropped = make_variant(path, size, size)
+    with Image.open(cropped) as img:
+        assert img.size == (size, size)
+    # 第二次直接使用缓存
+    assert make_variant(path, size, size) == cropped
+
+    small = tmp_path / "small.png"
+    Image.new("RGBA", (100, 100)).save(small)
+    assert make_variant(small, 128, 128) == small
+
+
+def test_make_variant_concurrent(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from PIL import Image
+
+    from nonebot_plugin_parser import config
+    from nonebot_plugin_parser.renders.variants import make_variant
+
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    monkeypatch.setattr(config, "_cache_dir", cache_dir)
+
+    path = tmp_path / "large.jpg"
+    Image.linear_gradient("L").resize((2000, 1500)).convert("RGB").save(path)
+
+    # 同一进程内多个线程同时生成同一张图片
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: make_variant(path, 800), range(8)))
+
+    assert len(set(results)) == 1
+    with Image.open(results[0]) as img:
+        assert img.size == (800, 600)
+    assert [file.name for file in cache_dir.iterdir()] == [results[0].name]
@@ -0,0 +1,86 @@
+import time
+import random
+
+from nonebot import logger
+
+
+def _naive_wrap(text: str, max_width: int, metrics) -> list[str]:
+    """逐字符扫描 emoji 列表的原始换行实现, 作为对照"""
+    import emoji
+
+    from nonebot_plugin_parser.renders.common.painter import CardPainter
+
+    text = text.replace("\t", " ").replace(chr(65039), "")
+    lines: list[str] = []
+    for paragraph in text.splitlines():
+        if not paragraph:
+            lines.append("")
+            continue
+
+        current_line = ""
+        current_width = 0
+        idx = 0
+        emoji_list = emoji.emoji_list(paragraph)
+        while idx < len(paragraph):
+            for ed in emoji_list:
+                if ed["match_start"] == idx:
+                    char = ed["emoji"]
+                    idx = ed["match_end"]
+                    char_width = metrics.font.size
+                    break
+            else:
+                char = paragraph[idx]
+                idx += 1
+                char_width = metrics.get_char_width_fast(char)
+
+            if not current_line:
+                current_line = char
+                current_width = char_width
+                continue
+            if len(char) == 1 and CardPainter.is_trailing_punctuation(char):
+                current_line += char
+                current_width += char_width
+                continue
+            if current_width + char_width <= max_width:
+                current_line += char
+                current_width += char_width
+            else:
+                lines.append(current_line)
+                current_line = char
+                current_width = char_width
+
+        if current_line:
+            lines.append(current_line)
+
+    return lines
+
+
+def _emoji_dense_text(length: int) -> str:
+    rng = random.Random(42)
+    pieces = ["中文内容", "English words ", "，", "。", "！", "😀", "👍🏻", "🇨🇳", "❤️", "👨‍👩‍👧", "\n", "\t"]
+    return "".join(rng.choice(pieces) for _ in range(length))
+
+
+def test_wrap_text_benchmark():
+    from nonebot_plugin_parser.renders.common import assets
+    from nonebot_plugin_parser.renders.common.painter import CardData, CardPainter
+
+    assets.ensure_resources()
+    painter = CardPainter(CardData(platform="test"), {})
+    metrics = assets.FONTS.body.metrics
+
+    for length in (500, 2000, 8000):
+        text = _emoji_dense_text(length)
+
+        start = time.perf_counter()
+        expected = _naive_wrap(text, painter.content_width, metrics)
+        naive_cost = time.perf_counter() - start
+
+        start = time.perf_counter()
+        lines = painter._wrap_text(text, painter.content_width, metrics)
+        cost = time.perf_counter() - start
+
+        assert lines == expected
+        logger.info(
+            f"片段数 {length}, 行数 {len(lines)}, 原实现 {naive_cost * 1000:.2f} ms, 当前实现 {cost * 1000:.2f} ms"
+        )